@@ -31,6 +31,9 @@ all_modules = [
     'kiro_proxy.core.browser',
     'kiro_proxy.core.flow_monitor',
     'kiro_proxy.core.usage',
+    'kiro_proxy.core.history_manager',
+    'kiro_proxy.core.error_handler',
+    'kiro_proxy.core.rate_limiter',
     'kiro_proxy.handlers',
     'kiro_proxy.handlers.anthropic',
     'kiro_proxy.handlers.openai',
@@ -6,6 +6,7 @@ from .device_flow import (
     get_login_state,
     save_credentials_to_file,
     DeviceFlowState,
+    close_http_client,
     # Social Auth
     start_social_auth,
     exchange_social_auth_token,
@@ -22,6 +23,7 @@ __all__ = [
     "get_login_state",
     "save_credentials_to_file",
     "DeviceFlowState",
+    "close_http_client",
     # Social Auth
     "start_social_auth",
     "exchange_social_auth_token",
@@ -12,20 +12,24 @@ Social Auth (Google/GitHub):
 3. 启动本地回调服务器接收授权码
 4. 用授权码交换 Token
 """
-import json
 import time
 import httpx
+import random
 import secrets
 import hashlib
 import base64
 import asyncio
 from pathlib import Path
+from urllib.parse import urlparse, parse_qs, quote
 from dataclasses import dataclass, asdict
 from typing import Optional, Tuple
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
 
+from .. import json_codec
+from ..http_client import create_async_client
 
-@dataclass
+
+@dataclass(slots=True)
 class DeviceFlowState:
     """设备授权流程状态"""
     client_id: str
@@ -34,26 +38,34 @@ class DeviceFlowState:
     user_code: str
     verification_uri: str
     interval: int
-    expires_at: int
+    expires_at: float  # time.monotonic() 基准
     region: str
-    started_at: float
+    started_at: float  # time.monotonic() 基准
+    network_backoff: bool = False  # 网络错误退避只翻倍一次
 
 
-@dataclass
+@dataclass(slots=True)
 class SocialAuthState:
     """Social Auth 登录状态"""
     provider: str  # Google / Github
     code_verifier: str
     code_challenge: str
     oauth_state: str
-    expires_at: int
-    started_at: float
+    expires_at: float  # time.monotonic() 基准
+    started_at: float  # time.monotonic() 基准
+
+
+@dataclass(slots=True)
+class AuthStateManager:
+    """登录流程的全局状态"""
+    device: Optional[DeviceFlowState] = None
+    social: Optional[SocialAuthState] = None
+    callback_server: Optional[object] = None
+    callback_future: Optional[asyncio.Future] = None  # 结果即回调参数
 
 
 # 全局登录状态
-_login_state: Optional[DeviceFlowState] = None
-_social_auth_state: Optional[SocialAuthState] = None
-_callback_server = None
+_mgr = AuthStateManager()
 
 # Kiro OIDC 配置
 KIRO_START_URL = "https://view.awsapps.com/start"
@@ -66,23 +78,113 @@ KIRO_SCOPES = [
     "codewhisperer:taskassist",
 ]
 
+# Social Auth 支持的登录提供商（小写 -> Kiro idp 名称）
+_PROVIDER_MAP = {"google": "Google", "github": "Github"}
+
+# Social Auth 回调地址与登录 URL 模板
+SOCIAL_CALLBACK_HOST = "127.0.0.1"
+SOCIAL_CALLBACK_PORT = 19823
+SOCIAL_CALLBACK_PATH = "/kiro-social-callback"
+SOCIAL_REDIRECT_URI = f"http://{SOCIAL_CALLBACK_HOST}:{SOCIAL_CALLBACK_PORT}{SOCIAL_CALLBACK_PATH}"
+_REDIRECT_URI_ENCODED = quote(SOCIAL_REDIRECT_URI, safe="")
+# code_challenge 是 base64url、state 来自 token_urlsafe，本身即 URL 安全，无需再编码
+_LOGIN_URL_TMPL = (
+    KIRO_AUTH_ENDPOINT
+    + "/login?idp={idp}&redirect_uri=" + _REDIRECT_URI_ENCODED
+    + "&code_challenge={cc}&code_challenge_method=S256&state={st}"
+)
+
+# 设备授权轮询间隔（RFC 8628 §3.5: slow_down 时间隔 +5 秒）
+POLL_SLOW_DOWN_STEP = 5
+POLL_MAX_INTERVAL = 30
+POLL_NETWORK_BACKOFF_CAP = 10
+POLL_JITTER = 0.3
+
+# 共享 HTTP 客户端（复用连接，避免每次轮询都重新握手）
+_http_client: Optional[httpx.AsyncClient] = None
+_http_client_loop: Optional[asyncio.AbstractEventLoop] = None
+# 正在关闭的旧客户端任务（持有引用，防止任务被回收）
+_closing_tasks: set = set()
+
+
+async def _aclose_quietly(client: httpx.AsyncClient):
+    try:
+        await client.aclose()
+    except Exception:
+        # 旧事件循环已关闭时连接无法正常关闭，交给垃圾回收
+        pass
+
+
+def _discard_client(client: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]):
+    """关闭被替换的旧客户端，释放其连接池"""
+    if client.is_closed:
+        return
+    if loop is not None and loop.is_running() and not loop.is_closed():
+        # 旧事件循环仍在其它线程运行，交回原循环关闭
+        asyncio.run_coroutine_threadsafe(_aclose_quietly(client), loop)
+        return
+    task = asyncio.get_running_loop().create_task(_aclose_quietly(client))
+    _closing_tasks.add(task)
+    task.add_done_callback(_closing_tasks.discard)
+
+
+def _get_client() -> httpx.AsyncClient:
+    """获取共享的 HTTP 客户端（按事件循环懒加载）
+    
+    事件循环变化时旧客户端会被关闭后重建。多次 asyncio.run() 的调用方
+    （如 CLI）应在循环结束前调用 close_http_client()，连接才能正常关闭。
+    """
+    global _http_client, _http_client_loop
+    loop = asyncio.get_running_loop()
+    if _http_client is None or _http_client.is_closed or _http_client_loop is not loop:
+        if _http_client is not None:
+            _discard_client(_http_client, _http_client_loop)
+        _http_client = create_async_client(
+            timeout=30,
+            follow_redirects=False,
+            limits=httpx.Limits(max_keepalive_connections=8, max_connections=16),
+        )
+        _http_client_loop = loop
+    return _http_client
+
+
+async def close_http_client():
+    """关闭共享的 HTTP 客户端"""
+    global _http_client, _http_client_loop
+    if _http_client is not None:
+        await _http_client.aclose()
+    _http_client = None
+    _http_client_loop = None
+
+
+def _json(resp: httpx.Response) -> dict:
+    """解析响应 JSON"""
+    return json_codec.loads(resp.content)
+
+
+def _expires_at_iso(expires_in: Optional[int]) -> str:
+    """计算凭证过期时间（ISO 格式，只读一次时钟；缺少 expiresIn 时为当前时间）"""
+    now = datetime.now(timezone.utc)
+    if expires_in:
+        now += timedelta(seconds=expires_in)
+    return now.isoformat()
+
 
 def get_login_state() -> Optional[dict]:
     """获取当前登录状态"""
-    global _login_state
-    if _login_state is None:
+    if _mgr.device is None:
         return None
     
     # 检查是否过期
-    if time.time() > _login_state.expires_at:
-        _login_state = None
+    if time.monotonic() > _mgr.device.expires_at:
+        _mgr.device = None
         return None
     
     return {
-        "user_code": _login_state.user_code,
-        "verification_uri": _login_state.verification_uri,
-        "expires_in": int(_login_state.expires_at - time.time()),
-        "interval": _login_state.interval,
+        "user_code": _mgr.device.user_code,
+        "verification_uri": _mgr.device.verification_uri,
+        "expires_in": int(_mgr.device.expires_at - time.monotonic()),
+        "interval": _mgr.device.interval,
     }
 
 
@@ -93,95 +195,95 @@ async def start_device_flow(region: str = "us-east-1") -> Tuple[bool, dict]:
     Returns:
         (success, result_or_error)
     """
-    global _login_state
     
     oidc_base = f"https://oidc.{region}.amazonaws.com"
     
-    async with httpx.AsyncClient(timeout=30) as client:
-        # Step 1: 注册 OIDC 客户端
-        print(f"[DeviceFlow] Step 1: 注册 OIDC 客户端...")
-        
-        reg_body = {
-            "clientName": "Kiro Proxy",
-            "clientType": "public",
-            "scopes": KIRO_SCOPES,
-            "grantTypes": ["urn:ietf:params:oauth:grant-type:device_code", "refresh_token"],
-            "issuerUrl": KIRO_START_URL
-        }
-        
-        try:
-            reg_resp = await client.post(
-                f"{oidc_base}/client/register",
-                json=reg_body,
-                headers={"Content-Type": "application/json"}
-            )
-        except Exception as e:
-            return False, {"error": f"注册客户端请求失败: {e}"}
-        
-        if reg_resp.status_code != 200:
-            return False, {"error": f"注册客户端失败: {reg_resp.text}"}
-        
-        reg_data = reg_resp.json()
-        client_id = reg_data.get("clientId")
-        client_secret = reg_data.get("clientSecret")
-        
-        if not client_id or not client_secret:
-            return False, {"error": "注册响应缺少 clientId 或 clientSecret"}
-        
-        print(f"[DeviceFlow] 客户端注册成功: {client_id[:20]}...")
-        
-        # Step 2: 发起设备授权
-        print(f"[DeviceFlow] Step 2: 发起设备授权...")
-        
-        auth_body = {
-            "clientId": client_id,
-            "clientSecret": client_secret,
-            "startUrl": KIRO_START_URL
-        }
-        
-        try:
-            auth_resp = await client.post(
-                f"{oidc_base}/device_authorization",
-                json=auth_body,
-                headers={"Content-Type": "application/json"}
-            )
-        except Exception as e:
-            return False, {"error": f"设备授权请求失败: {e}"}
-        
-        if auth_resp.status_code != 200:
-            return False, {"error": f"设备授权失败: {auth_resp.text}"}
-        
-        auth_data = auth_resp.json()
-        device_code = auth_data.get("deviceCode")
-        user_code = auth_data.get("userCode")
-        verification_uri = auth_data.get("verificationUriComplete") or auth_data.get("verificationUri")
-        interval = auth_data.get("interval", 5)
-        expires_in = auth_data.get("expiresIn", 600)
-        
-        if not device_code or not user_code or not verification_uri:
-            return False, {"error": "设备授权响应缺少必要字段"}
-        
-        print(f"[DeviceFlow] 设备码获取成功: {user_code}")
-        
-        # 保存状态
-        _login_state = DeviceFlowState(
-            client_id=client_id,
-            client_secret=client_secret,
-            device_code=device_code,
-            user_code=user_code,
-            verification_uri=verification_uri,
-            interval=interval,
-            expires_at=int(time.time() + expires_in),
-            region=region,
-            started_at=time.time()
+    client = _get_client()
+
+    # Step 1: 注册 OIDC 客户端
+    print(f"[DeviceFlow] Step 1: 注册 OIDC 客户端...")
+    
+    reg_body = {
+        "clientName": "Kiro Proxy",
+        "clientType": "public",
+        "scopes": KIRO_SCOPES,
+        "grantTypes": ["urn:ietf:params:oauth:grant-type:device_code", "refresh_token"],
+        "issuerUrl": KIRO_START_URL
+    }
+    
+    try:
+        reg_resp = await client.post(
+            f"{oidc_base}/client/register",
+            content=json_codec.dumps(reg_body),
+            headers={"Content-Type": "application/json"}
         )
-        
-        return True, {
-            "user_code": user_code,
-            "verification_uri": verification_uri,
-            "expires_in": expires_in,
-            "interval": interval,
-        }
+    except Exception as e:
+        return False, {"error": f"注册客户端请求失败: {e}"}
+    
+    if reg_resp.status_code != 200:
+        return False, {"error": f"注册客户端失败: {reg_resp.text}"}
+    
+    reg_data = _json(reg_resp)
+    client_id = reg_data.get("clientId")
+    client_secret = reg_data.get("clientSecret")
+    
+    if not client_id or not client_secret:
+        return False, {"error": "注册响应缺少 clientId 或 clientSecret"}
+    
+    print(f"[DeviceFlow] 客户端注册成功: {client_id[:20]}...")
+    
+    # Step 2: 发起设备授权
+    print(f"[DeviceFlow] Step 2: 发起设备授权...")
+    
+    auth_body = {
+        "clientId": client_id,
+        "clientSecret": client_secret,
+        "startUrl": KIRO_START_URL
+    }
+    
+    try:
+        auth_resp = await client.post(
+            f"{oidc_base}/device_authorization",
+            content=json_codec.dumps(auth_body),
+            headers={"Content-Type": "application/json"}
+        )
+    except Exception as e:
+        return False, {"error": f"设备授权请求失败: {e}"}
+    
+    if auth_resp.status_code != 200:
+        return False, {"error": f"设备授权失败: {auth_resp.text}"}
+    
+    auth_data = _json(auth_resp)
+    device_code = auth_data.get("deviceCode")
+    user_code = auth_data.get("userCode")
+    verification_uri = auth_data.get("verificationUriComplete") or auth_data.get("verificationUri")
+    interval = auth_data.get("interval", 5)
+    expires_in = auth_data.get("expiresIn", 600)
+    
+    if not device_code or not user_code or not verification_uri:
+        return False, {"error": "设备授权响应缺少必要字段"}
+    
+    print(f"[DeviceFlow] 设备码获取成功: {user_code}")
+    
+    # 保存状态
+    _mgr.device = DeviceFlowState(
+        client_id=client_id,
+        client_secret=client_secret,
+        device_code=device_code,
+        user_code=user_code,
+        verification_uri=verification_uri,
+        interval=interval,
+        expires_at=time.monotonic() + expires_in,
+        region=region,
+        started_at=time.monotonic()
+    )
+    
+    return True, {
+        "user_code": user_code,
+        "verification_uri": verification_uri,
+        "expires_in": expires_in,
+        "interval": interval,
+    }
 
 
 async def poll_device_flow() -> Tuple[bool, dict]:
@@ -191,92 +293,100 @@ async def poll_device_flow() -> Tuple[bool, dict]:
     Returns:
         (success, result_or_error)
         - success=True, result={"completed": True, "credentials": {...}} 授权完成
-        - success=True, result={"completed": False, "status": "pending"} 等待中
-        - success=False, result={"error": "..."} 错误
+        - success=True, result={"completed": False, "status": "pending", "interval": ...}
+          等待中，interval 为下次轮询间隔（秒），带 ±POLL_JITTER 的抖动
+        - success=True, result={"completed": False, "status": "slow_down", "interval": ...}
+          服务端要求降速，间隔 +POLL_SLOW_DOWN_STEP 秒，最多 POLL_MAX_INTERVAL 秒
+        - success=True, result={"completed": False, "status": "network_error", "interval": ...}
+          网络错误（请求未到达服务端）不再视为失败，登录状态保留，调用方按 interval 继续轮询；
+          间隔在整个流程中只翻倍一次，最多 POLL_NETWORK_BACKOFF_CAP 秒
+        - success=False, result={"error": "..."} 错误（登录已结束或服务端拒绝）
     """
-    global _login_state
     
-    if _login_state is None:
+    if _mgr.device is None:
         return False, {"error": "没有进行中的登录"}
     
     # 检查是否过期
-    if time.time() > _login_state.expires_at:
-        _login_state = None
+    if time.monotonic() > _mgr.device.expires_at:
+        _mgr.device = None
         return False, {"error": "授权已过期，请重新开始"}
     
-    oidc_base = f"https://oidc.{_login_state.region}.amazonaws.com"
+    oidc_base = f"https://oidc.{_mgr.device.region}.amazonaws.com"
     
     token_body = {
-        "clientId": _login_state.client_id,
-        "clientSecret": _login_state.client_secret,
+        "clientId": _mgr.device.client_id,
+        "clientSecret": _mgr.device.client_secret,
         "grantType": "urn:ietf:params:oauth:grant-type:device_code",
-        "deviceCode": _login_state.device_code
+        "deviceCode": _mgr.device.device_code
     }
     
-    async with httpx.AsyncClient(timeout=30) as client:
-        try:
-            token_resp = await client.post(
-                f"{oidc_base}/token",
-                json=token_body,
-                headers={"Content-Type": "application/json"}
-            )
-        except Exception as e:
+    client = _get_client()
+
+    try:
+        token_resp = await client.post(
+            f"{oidc_base}/token",
+            content=json_codec.dumps(token_body),
+            headers={"Content-Type": "application/json"}
+        )
+    except Exception as e:
+        # 网络错误：间隔只翻倍一次（上限 10 秒），不做指数叠加
+        login = _mgr.device
+        if login is None:
             return False, {"error": f"Token 请求失败: {e}"}
+        if not login.network_backoff:
+            login.interval = max(login.interval, min(login.interval * 2, POLL_NETWORK_BACKOFF_CAP))
+            login.network_backoff = True
+        return True, {"completed": False, "status": "network_error", "interval": login.interval}
+    
+    if token_resp.status_code == 200:
+        # 授权成功
+        token_data = _json(token_resp)
         
-        if token_resp.status_code == 200:
-            # 授权成功
-            token_data = token_resp.json()
-            
-            credentials = {
-                "accessToken": token_data.get("accessToken"),
-                "refreshToken": token_data.get("refreshToken"),
-                "expiresAt": datetime.now(timezone.utc).isoformat(),
-                "clientId": _login_state.client_id,
-                "clientSecret": _login_state.client_secret,
-                "region": _login_state.region,
-                "authMethod": "idc",
-            }
-            
-            # 计算过期时间
-            if expires_in := token_data.get("expiresIn"):
-                from datetime import timedelta
-                expires_at = datetime.now(timezone.utc) + timedelta(seconds=expires_in)
-                credentials["expiresAt"] = expires_at.isoformat()
-            
-            # 清除状态
-            _login_state = None
-            
-            print(f"[DeviceFlow] 授权成功！")
-            return True, {"completed": True, "credentials": credentials}
+        credentials = {
+            "accessToken": token_data.get("accessToken"),
+            "refreshToken": token_data.get("refreshToken"),
+            "expiresAt": _expires_at_iso(token_data.get("expiresIn")),
+            "clientId": _mgr.device.client_id,
+            "clientSecret": _mgr.device.client_secret,
+            "region": _mgr.device.region,
+            "authMethod": "idc",
+        }
         
-        # 检查错误类型
-        try:
-            error_data = token_resp.json()
-            error_code = error_data.get("error", "")
-        except:
-            error_code = ""
+        # 清除状态
+        _mgr.device = None
         
-        if error_code == "authorization_pending":
-            # 用户还未完成授权
-            return True, {"completed": False, "status": "pending"}
-        elif error_code == "slow_down":
-            # 请求太频繁
-            return True, {"completed": False, "status": "slow_down"}
-        elif error_code == "expired_token":
-            _login_state = None
-            return False, {"error": "授权已过期，请重新开始"}
-        elif error_code == "access_denied":
-            _login_state = None
-            return False, {"error": "用户拒绝授权"}
-        else:
-            return False, {"error": f"Token 请求失败: {token_resp.text}"}
+        print(f"[DeviceFlow] 授权成功！")
+        return True, {"completed": True, "credentials": credentials}
+    
+    # 检查错误类型
+    try:
+        error_data = _json(token_resp)
+        error_code = error_data.get("error", "")
+    except:
+        error_code = ""
+    
+    if error_code == "authorization_pending":
+        # 用户还未完成授权（加少量抖动，避免多个轮询同时打到服务端）
+        interval = _mgr.device.interval + random.uniform(-POLL_JITTER, POLL_JITTER)
+        return True, {"completed": False, "status": "pending", "interval": round(interval, 2)}
+    elif error_code == "slow_down":
+        # 请求太频繁，按 RFC 8628 增大轮询间隔
+        _mgr.device.interval = min(_mgr.device.interval + POLL_SLOW_DOWN_STEP, POLL_MAX_INTERVAL)
+        return True, {"completed": False, "status": "slow_down", "interval": _mgr.device.interval}
+    elif error_code == "expired_token":
+        _mgr.device = None
+        return False, {"error": "授权已过期，请重新开始"}
+    elif error_code == "access_denied":
+        _mgr.device = None
+        return False, {"error": "用户拒绝授权"}
+    else:
+        return False, {"error": f"Token 请求失败: {token_resp.text}"}
 
 
 def cancel_device_flow() -> bool:
     """取消设备授权流程"""
-    global _login_state
-    if _login_state is not None:
-        _login_state = None
+    if _mgr.device is not None:
+        _mgr.device = None
         return True
     return False
 
@@ -289,13 +399,17 @@ async def save_credentials_to_file(credentials: dict, name: str = "kiro-proxy-au
         保存的文件路径
     """
     cache_dir = Path.home() / ".aws/sso/cache"
-    cache_dir.mkdir(parents=True, exist_ok=True)
     
     # 生成文件名
     file_path = cache_dir / f"{name}.json"
+    payload = json_codec.dumps(credentials, indent=True)
+    
+    def _write():
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        file_path.write_bytes(payload)
     
-    with open(file_path, "w") as f:
-        json.dump(credentials, f, indent=2)
+    # 文件 IO 放到线程中执行，避免阻塞事件循环
+    await asyncio.to_thread(_write)
     
     print(f"[DeviceFlow] 凭证已保存到: {file_path}")
     return str(file_path)
@@ -303,15 +417,17 @@ async def save_credentials_to_file(credentials: dict, name: str = "kiro-proxy-au
 
 # ==================== Social Auth (Google/GitHub) ====================
 
+_b64url = base64.urlsafe_b64encode
+
+
 def _generate_code_verifier() -> str:
-    """生成 PKCE code_verifier"""
-    return secrets.token_urlsafe(64)[:128]
+    """生成 PKCE code_verifier (RFC 7636: 32 字节随机数 -> 43 字符)"""
+    return secrets.token_urlsafe(32)
 
 
 def _generate_code_challenge(verifier: str) -> str:
     """生成 PKCE code_challenge (SHA256)"""
-    digest = hashlib.sha256(verifier.encode()).digest()
-    return base64.urlsafe_b64encode(digest).rstrip(b'=').decode()
+    return _b64url(hashlib.sha256(verifier.encode("ascii")).digest()).rstrip(b"=").decode("ascii")
 
 
 def _generate_oauth_state() -> str:
@@ -321,17 +437,16 @@ def _generate_oauth_state() -> str:
 
 def get_social_auth_state() -> Optional[dict]:
     """获取当前 Social Auth 状态"""
-    global _social_auth_state
-    if _social_auth_state is None:
+    if _mgr.social is None:
         return None
     
-    if time.time() > _social_auth_state.expires_at:
-        _social_auth_state = None
+    if time.monotonic() > _mgr.social.expires_at:
+        _mgr.social = None
         return None
     
     return {
-        "provider": _social_auth_state.provider,
-        "expires_in": int(_social_auth_state.expires_at - time.time()),
+        "provider": _mgr.social.provider,
+        "expires_in": int(_mgr.social.expires_at - time.monotonic()),
     }
 
 
@@ -345,15 +460,10 @@ async def start_social_auth(provider: str) -> Tuple[bool, dict]:
     Returns:
         (success, result_or_error)
     """
-    global _social_auth_state
     
     # 验证 provider
-    provider_normalized = provider.lower()
-    if provider_normalized == "google":
-        provider_normalized = "Google"
-    elif provider_normalized == "github":
-        provider_normalized = "Github"
-    else:
+    provider_normalized = _PROVIDER_MAP.get(provider.lower())
+    if provider_normalized is None:
         return False, {"error": f"不支持的登录提供商: {provider}"}
     
     print(f"[SocialAuth] 开始 {provider_normalized} 登录流程")
@@ -363,23 +473,19 @@ async def start_social_auth(provider: str) -> Tuple[bool, dict]:
     code_challenge = _generate_code_challenge(code_verifier)
     oauth_state = _generate_oauth_state()
     
-    # 回调地址
-    redirect_uri = "http://127.0.0.1:19823/kiro-social-callback"
-    
     # 构建登录 URL
-    from urllib.parse import urlencode, quote
-    login_url = f"{KIRO_AUTH_ENDPOINT}/login?idp={provider_normalized}&redirect_uri={quote(redirect_uri)}&code_challenge={quote(code_challenge)}&code_challenge_method=S256&state={quote(oauth_state)}"
+    login_url = _LOGIN_URL_TMPL.format(idp=provider_normalized, cc=code_challenge, st=oauth_state)
     
     print(f"[SocialAuth] 登录 URL: {login_url}")
     
     # 保存状态（10 分钟过期）
-    _social_auth_state = SocialAuthState(
+    _mgr.social = SocialAuthState(
         provider=provider_normalized,
         code_verifier=code_verifier,
         code_challenge=code_challenge,
         oauth_state=oauth_state,
-        expires_at=int(time.time() + 600),
-        started_at=time.time(),
+        expires_at=time.monotonic() + 600,
+        started_at=time.monotonic(),
     )
     
     return True, {
@@ -400,19 +506,18 @@ async def exchange_social_auth_token(code: str, state: str) -> Tuple[bool, dict]
     Returns:
         (success, result_or_error)
     """
-    global _social_auth_state
     
-    if _social_auth_state is None:
+    if _mgr.social is None:
         return False, {"error": "没有进行中的社交登录"}
     
     # 验证 state
-    if state != _social_auth_state.oauth_state:
-        _social_auth_state = None
+    if state != _mgr.social.oauth_state:
+        _mgr.social = None
         return False, {"error": "OAuth state 不匹配"}
     
     # 检查过期
-    if time.time() > _social_auth_state.expires_at:
-        _social_auth_state = None
+    if time.monotonic() > _mgr.social.expires_at:
+        _mgr.social = None
         return False, {"error": "登录已过期，请重新开始"}
     
     print(f"[SocialAuth] 交换 Token...")
@@ -421,129 +526,152 @@ async def exchange_social_auth_token(code: str, state: str) -> Tuple[bool, dict]
     token_body = {
         "grant_type": "authorization_code",
         "code": code,
-        "redirect_uri": "http://127.0.0.1:19823/kiro-social-callback",
-        "code_verifier": _social_auth_state.code_verifier,
+        "redirect_uri": SOCIAL_REDIRECT_URI,
+        "code_verifier": _mgr.social.code_verifier,
     }
     
-    async with httpx.AsyncClient(timeout=30) as client:
-        try:
-            token_resp = await client.post(
-                f"{KIRO_AUTH_ENDPOINT}/oauth/token",
-                json=token_body,
-                headers={"Content-Type": "application/json"}
-            )
-        except Exception as e:
-            _social_auth_state = None
-            return False, {"error": f"Token 请求失败: {e}"}
-        
-        if token_resp.status_code != 200:
-            error_text = token_resp.text
-            _social_auth_state = None
-            return False, {"error": f"Token 交换失败: {error_text}"}
-        
-        token_data = token_resp.json()
-        
-        credentials = {
-            "accessToken": token_data.get("access_token"),
-            "refreshToken": token_data.get("refresh_token"),
-            "expiresAt": datetime.now(timezone.utc).isoformat(),
-            "authMethod": "social",
-        }
-        
-        # 计算过期时间
-        if expires_in := token_data.get("expires_in"):
-            from datetime import timedelta
-            expires_at = datetime.now(timezone.utc) + timedelta(seconds=expires_in)
-            credentials["expiresAt"] = expires_at.isoformat()
-        
-        provider = _social_auth_state.provider
-        _social_auth_state = None
-        
-        print(f"[SocialAuth] {provider} 登录成功！")
-        return True, {"completed": True, "credentials": credentials, "provider": provider}
+    client = _get_client()
+
+    try:
+        token_resp = await client.post(
+            f"{KIRO_AUTH_ENDPOINT}/oauth/token",
+            content=json_codec.dumps(token_body),
+            headers={"Content-Type": "application/json"}
+        )
+    except Exception as e:
+        _mgr.social = None
+        return False, {"error": f"Token 请求失败: {e}"}
+    
+    if token_resp.status_code != 200:
+        error_text = token_resp.text
+        _mgr.social = None
+        return False, {"error": f"Token 交换失败: {error_text}"}
+    
+    token_data = _json(token_resp)
+    
+    credentials = {
+        "accessToken": token_data.get("access_token"),
+        "refreshToken": token_data.get("refresh_token"),
+        "expiresAt": _expires_at_iso(token_data.get("expires_in")),
+        "authMethod": "social",
+    }
+    
+    provider = _mgr.social.provider
+    _mgr.social = None
+    
+    print(f"[SocialAuth] {provider} 登录成功！")
+    return True, {"completed": True, "credentials": credentials, "provider": provider}
 
 
 def cancel_social_auth() -> bool:
     """取消 Social Auth 登录"""
-    global _social_auth_state
-    if _social_auth_state is not None:
-        _social_auth_state = None
+    if _mgr.social is not None:
+        _mgr.social = None
         return True
     return False
 
 
 # ==================== 回调服务器 ====================
 
-_callback_result = None
-_callback_event = None
-
-async def start_callback_server() -> Tuple[bool, dict]:
-    """启动本地回调服务器"""
-    global _callback_result, _callback_event
-    
-    from aiohttp import web
-    
-    _callback_result = None
-    _callback_event = asyncio.Event()
-    
-    async def handle_callback(request):
-        global _callback_result
-        code = request.query.get("code")
-        state = request.query.get("state")
-        error = request.query.get("error")
+_SUCCESS_HTML = """
+<html>
+<head><meta charset="utf-8"><title>登录成功</title></head>
+<body style="font-family:sans-serif;text-align:center;padding:50px">
+    <h1>✅ 登录成功</h1>
+    <p>您可以关闭此窗口并返回 Kiro Proxy</p>
+    <script>setTimeout(()=>window.close(),2000)</script>
+</body>
+</html>
+""".encode("utf-8")
+
+_SUCCESS_RESPONSE = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: text/html; charset=utf-8\r\n"
+    b"Content-Length: " + str(len(_SUCCESS_HTML)).encode("ascii") + b"\r\n"
+    b"Connection: close\r\n\r\n" + _SUCCESS_HTML
+)
+
+_NOT_FOUND_RESPONSE = (
+    b"HTTP/1.1 404 Not Found\r\n"
+    b"Content-Length: 0\r\n"
+    b"Connection: close\r\n\r\n"
+)
+
+
+async def _handle_callback(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """处理回调请求（只解析请求行，其余头部直接丢弃）"""
+    try:
+        request_line = await reader.readline()
+        # 消费请求头
+        while (await reader.readline()).strip():
+            pass
+        
+        parts = request_line.split(b" ")
+        target = parts[1].decode("ascii", "ignore") if len(parts) >= 2 else ""
+        parsed = urlparse(target)
+        if parsed.path != SOCIAL_CALLBACK_PATH:
+            writer.write(_NOT_FOUND_RESPONSE)
+            return
+        
+        query = parse_qs(parsed.query)
+        code = query.get("code", [None])[0]
+        state = query.get("state", [None])[0]
+        error = query.get("error", [None])[0]
         
         if error:
-            _callback_result = {"error": error}
+            result = {"error": error}
         elif code and state:
-            _callback_result = {"code": code, "state": state}
+            result = {"code": code, "state": state}
         else:
-            _callback_result = {"error": "缺少授权码"}
+            result = {"error": "缺少授权码"}
         
-        _callback_event.set()
+        future = _mgr.callback_future
+        if future is not None and not future.done():
+            future.set_result(result)
         
-        # 返回成功页面
-        html = """
-        <html>
-        <head><title>登录成功</title></head>
-        <body style="font-family:sans-serif;text-align:center;padding:50px">
-            <h1>✅ 登录成功</h1>
-            <p>您可以关闭此窗口并返回 Kiro Proxy</p>
-            <script>setTimeout(()=>window.close(),2000)</script>
-        </body>
-        </html>
-        """
-        return web.Response(text=html, content_type="text/html")
-    
-    app = web.Application()
-    app.router.add_get("/kiro-social-callback", handle_callback)
-    
-    runner = web.AppRunner(app)
-    await runner.setup()
+        writer.write(_SUCCESS_RESPONSE)
+    finally:
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+
+async def _close_callback_server():
+    """关闭回调服务器"""
+    server = _mgr.callback_server
+    _mgr.callback_server = None
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+
+
+async def start_callback_server() -> Tuple[bool, dict]:
+    """启动本地回调服务器"""
+    await _close_callback_server()
+    
+    _mgr.callback_future = asyncio.get_running_loop().create_future()
     
     try:
-        site = web.TCPSite(runner, "127.0.0.1", 19823)
-        await site.start()
-        print("[SocialAuth] 回调服务器已启动: http://127.0.0.1:19823")
-        return True, {"port": 19823}
+        _mgr.callback_server = await asyncio.start_server(
+            _handle_callback, SOCIAL_CALLBACK_HOST, SOCIAL_CALLBACK_PORT
+        )
+        print(f"[SocialAuth] 回调服务器已启动: http://{SOCIAL_CALLBACK_HOST}:{SOCIAL_CALLBACK_PORT}")
+        return True, {"port": SOCIAL_CALLBACK_PORT}
     except Exception as e:
         return False, {"error": f"启动回调服务器失败: {e}"}
 
 
 async def wait_for_callback(timeout: int = 300) -> Tuple[bool, dict]:
     """等待回调"""
-    global _callback_result, _callback_event
     
-    if _callback_event is None:
+    if _mgr.callback_future is None:
         return False, {"error": "回调服务器未启动"}
     
     try:
-        await asyncio.wait_for(_callback_event.wait(), timeout=timeout)
-        
-        if _callback_result and "code" in _callback_result:
-            return True, _callback_result
-        elif _callback_result and "error" in _callback_result:
-            return False, _callback_result
-        else:
-            return False, {"error": "未收到有效回调"}
+        result = await asyncio.wait_for(_mgr.callback_future, timeout=timeout)
+        return "code" in result, result
     except asyncio.TimeoutError:
         return False, {"error": "等待回调超时"}
+    finally:
+        await _close_callback_server()
@@ -7,6 +7,19 @@ import sys
 from pathlib import Path
 
 
+def _run_auth(coro):
+    """在新事件循环中执行认证协程，循环结束前关闭认证模块的共享 HTTP 客户端"""
+    from .auth import close_http_client
+    
+    async def _main():
+        try:
+            return await coro
+        finally:
+            await close_http_client()
+    
+    return asyncio.run(_main())
+
+
 def cmd_serve(args):
     """启动代理服务"""
     from .main import run
@@ -233,7 +246,7 @@ def cmd_login_social(args):
             return
         
         from .auth import exchange_social_auth_token
-        success, result = asyncio.run(exchange_social_auth_token(code, oauth_state))
+        success, result = _run_auth(exchange_social_auth_token(code, oauth_state))
         
         if success and result.get("completed"):
             import uuid
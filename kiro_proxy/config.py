@@ -25,6 +25,7 @@ from .env_config import (
     MODEL_CACHE_TTL,
     MAX_RETRIES,
     BASE_RETRY_DELAY,
+    MAX_RETRY_DELAY,
     CIRCUIT_BREAKER_RECOVERY_TIMEOUT,
     CIRCUIT_BREAKER_MAX_BACKOFF,
     CIRCUIT_BREAKER_RETRY_CHANCE,
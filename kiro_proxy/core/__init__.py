@@ -1,24 +1,48 @@
-"""核心模块"""
+"""核心模块
+
+子模块按需加载（PEP 562）：只有首次访问对应名称时才导入。
+state / scheduler / flow_monitor / rate_limiter 与同名子模块冲突，必须立即导入，
+否则子模块被导入后包属性会指向模块而不是实例。
+"""
+import importlib
+
 from .state import state, ProxyState, RequestLog
-from .account import Account
-from .persistence import load_config, save_config, CONFIG_FILE
-from .retry import RetryableRequest, is_retryable_error, RETRYABLE_STATUS_CODES, CircuitBreaker
 from .scheduler import scheduler
-from .stats import stats_manager
-from .browser import detect_browsers, open_url, get_browsers_info
 from .flow_monitor import flow_monitor, FlowMonitor, LLMFlow, FlowState, TokenUsage
-from .usage import get_usage_limits, get_account_usage, UsageInfo
-from .history_manager import (
-    HistoryManager, HistoryConfig, TruncateStrategy,
-    get_history_config, set_history_config, update_history_config,
-    is_content_length_error
-)
-from .error_handler import (
-    ErrorType, KiroError, classify_error, is_account_suspended,
-    get_anthropic_error_response, format_error_log
-)
 from .rate_limiter import RateLimiter, RateLimitConfig, rate_limiter, get_rate_limiter
 
+# 名称 -> 子模块
+_LAZY = {
+    "Account": "account",
+    "load_config": "persistence", "save_config": "persistence", "CONFIG_FILE": "persistence",
+    "RetryableRequest": "retry", "is_retryable_error": "retry",
+    "RETRYABLE_STATUS_CODES": "retry", "CircuitBreaker": "retry",
+    "stats_manager": "stats",
+    "detect_browsers": "browser", "open_url": "browser", "get_browsers_info": "browser",
+    "get_usage_limits": "usage", "get_account_usage": "usage", "UsageInfo": "usage",
+    "HistoryManager": "history_manager", "HistoryConfig": "history_manager",
+    "TruncateStrategy": "history_manager", "get_history_config": "history_manager",
+    "set_history_config": "history_manager", "update_history_config": "history_manager",
+    "is_content_length_error": "history_manager",
+    "ErrorType": "error_handler", "KiroError": "error_handler", "classify_error": "error_handler",
+    "is_account_suspended": "error_handler", "get_anthropic_error_response": "error_handler",
+    "format_error_log": "error_handler",
+}
+
+
+def __getattr__(name):
+    modname = _LAZY.get(name)
+    if modname is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{modname}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
+
 __all__ = [
     "state", "ProxyState", "RequestLog", "Account", 
     "load_config", "save_config", "CONFIG_FILE",
@@ -1,17 +1,59 @@
 """账号管理"""
-import json
+import asyncio
 import time
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Container, Optional
 
 from ..credential import (
     KiroCredentials, TokenRefresher, CredentialStatus,
     generate_machine_id, quota_manager
 )
 
+from .. import json_codec
+from ..logger import get_logger
 
-@dataclass
+logger = get_logger("account")
+
+# 不可用的凭证状态
+_UNAVAILABLE_STATUSES = frozenset({
+    CredentialStatus.DISABLED, CredentialStatus.UNHEALTHY, CredentialStatus.SUSPENDED,
+})
+
+_rate_limiter = None
+
+# clientIdHash 凭证文件缓存: 路径 -> (mtime_ns, 解析结果)
+# 多个 IDC 账号常共用同一个 OIDC 客户端，避免每个账号重复读取解析同一文件
+_hash_file_cache: dict = {}
+
+
+def _load_hash_file(path: Path) -> Optional[dict]:
+    """读取 clientIdHash 凭证文件（按 mtime 缓存，只读，不要修改返回值）"""
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return None
+    
+    key = str(path)
+    cached = _hash_file_cache.get(key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    
+    data = json_codec.loads(path.read_bytes())
+    _hash_file_cache[key] = (mtime, data)
+    return data
+
+
+def _get_rate_limiter():
+    """获取限速器（首次调用时解析并缓存，避免循环导入）"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        from .rate_limiter import get_rate_limiter
+        _rate_limiter = get_rate_limiter()
+    return _rate_limiter
+
+
+@dataclass(slots=True)
 class Account:
     """账号信息"""
     id: str
@@ -26,16 +68,34 @@ class Account:
     
     _credentials: Optional[KiroCredentials] = field(default=None, repr=False)
     _machine_id: Optional[str] = field(default=None, repr=False)
+    # error_rate 缓存：计数不变时复用上次格式化结果
+    _error_rate_key: tuple = field(default=(-1, -1), init=False, repr=False, compare=False)
+    _error_rate_cached: str = field(default="0.0%", init=False, repr=False, compare=False)
+    # 进行中的 token 刷新，并发调用方共享同一次刷新
+    _refresh_task: Optional[asyncio.Task] = field(default=None, init=False, repr=False, compare=False)
+    
+    @property
+    def error_rate(self) -> str:
+        """错误率（格式化字符串，按计数缓存）"""
+        key = (self.error_count, self.request_count)
+        if key != self._error_rate_key:
+            self._error_rate_cached = f"{self.error_count * 100 / max(1, self.request_count):.1f}%"
+            self._error_rate_key = key
+        return self._error_rate_cached
     
-    def is_available(self) -> bool:
-        """检查账号是否可用"""
+    def is_available(self, cooling_ids: Optional[Container[str]] = None) -> bool:
+        """检查账号是否可用
+        
+        Args:
+            cooling_ids: 批量选号时预先取出的冷却中账号 id，传入后不再逐个查询配额管理器
+        """
         if not self.enabled:
             return False
-        if self.status in (CredentialStatus.DISABLED, CredentialStatus.UNHEALTHY, CredentialStatus.SUSPENDED):
+        if self.status in _UNAVAILABLE_STATUSES:
             return False
-        if not quota_manager.is_available(self.id):
-            return False
-        return True
+        if cooling_ids is not None:
+            return self.id not in cooling_ids
+        return quota_manager.is_available(self.id)
     
     def load_credentials(self) -> Optional[KiroCredentials]:
         """加载凭证信息"""
@@ -52,7 +112,7 @@ class Account:
             self._machine_id = None
             return self._credentials
         except Exception as e:
-            print(f"[Account] 加载凭证失败 {self.id}: {e}")
+            logger.warning(f"加载凭证失败 {self.id}: {e}")
             return None
     
     def _merge_client_credentials(self):
@@ -63,16 +123,16 @@ class Account:
         cache_dir = Path(self.token_path).parent
         hash_file = cache_dir / f"{self._credentials.client_id_hash}.json"
         
-        if hash_file.exists():
-            try:
-                with open(hash_file) as f:
-                    data = json.load(f)
-                if not self._credentials.client_id:
-                    self._credentials.client_id = data.get("clientId")
-                if not self._credentials.client_secret:
-                    self._credentials.client_secret = data.get("clientSecret")
-            except Exception:
-                pass
+        try:
+            data = _load_hash_file(hash_file)
+        except Exception:
+            return
+        
+        if isinstance(data, dict):
+            if not self._credentials.client_id:
+                self._credentials.client_id = data.get("clientId")
+            if not self._credentials.client_secret:
+                self._credentials.client_secret = data.get("clientSecret")
     
     def get_credentials(self) -> Optional[KiroCredentials]:
         """获取凭证（带缓存）"""
@@ -83,14 +143,7 @@ class Account:
     def get_token(self) -> str:
         """获取 access_token"""
         creds = self.get_credentials()
-        if creds and creds.access_token:
-            return creds.access_token
-        
-        try:
-            with open(self.token_path) as f:
-                return json.load(f).get("accessToken", "")
-        except Exception:
-            return ""
+        return creds.access_token if creds and creds.access_token else ""
     
     def get_machine_id(self) -> str:
         """获取基于此账号的 Machine ID"""
@@ -119,8 +172,30 @@ class Account:
         creds = self.get_credentials()
         return creds.is_expiring_soon(minutes) if creds else False
     
+    def is_token_expiring_within(self, seconds: float) -> bool:
+        """检查 token 是否将在 seconds 秒内过期"""
+        creds = self.get_credentials()
+        return creds.is_expiring_within(seconds) if creds else False
+    
     async def refresh_token(self) -> tuple:
-        """刷新 token"""
+        """刷新 token
+        
+        同一账号的并发调用（如多个请求同时遇到 token 过期）合并为一次刷新，
+        都等待同一个结果，避免对刷新接口重复请求。
+        """
+        task = self._refresh_task
+        if task is None:
+            task = asyncio.ensure_future(self._do_refresh_token())
+            self._refresh_task = task
+            task.add_done_callback(self._clear_refresh_task)
+        # shield: 某个调用方被取消时不影响其它等待者
+        return await asyncio.shield(task)
+    
+    def _clear_refresh_task(self, task: asyncio.Task):
+        if self._refresh_task is task:
+            self._refresh_task = None
+    
+    async def _do_refresh_token(self) -> tuple:
         creds = self.get_credentials()
         if not creds:
             return False, "无法加载凭证"
@@ -129,7 +204,7 @@ class Account:
         success, result = await refresher.refresh()
         
         if success:
-            creds.save_to_file(self.token_path)
+            await asyncio.to_thread(creds.save_to_file, self.token_path)
             self._credentials = creds
             self.status = CredentialStatus.ACTIVE
             return True, "Token 刷新成功"
@@ -139,18 +214,14 @@ class Account:
     
     def mark_quota_exceeded(self, reason: str = "Rate limited"):
         """标记配额超限（只在限速启用时生效）"""
-        from .rate_limiter import get_rate_limiter
-        rate_limiter = get_rate_limiter()
+        self.error_count += 1
         
-        if rate_limiter.should_apply_quota_cooldown():
+        # 限速未启用时不标记冷却，只记录错误
+        limiter = _get_rate_limiter()
+        if limiter.should_apply_quota_cooldown():
             # 使用限速器配置的冷却时间
-            cooldown = rate_limiter.get_quota_cooldown_seconds()
-            quota_manager.mark_exceeded(self.id, reason, cooldown_seconds=cooldown)
+            quota_manager.mark_exceeded(self.id, reason, cooldown_seconds=limiter.get_quota_cooldown_seconds())
             self.status = CredentialStatus.COOLDOWN
-            self.error_count += 1
-        # 如果限速未启用，不标记冷却，只记录错误
-        else:
-            self.error_count += 1
     
     def get_proxy_url(self) -> Optional[str]:
         """Get normalized proxy URL for this account.
@@ -165,22 +236,28 @@ class Account:
             url = f"http://{url}"
         return url
 
-    def get_status_info(self) -> dict:
-        """获取状态信息"""
+    def get_status_info(self, cooling_ids: Optional[Container[str]] = None) -> dict:
+        """获取状态信息
+        
+        Args:
+            cooling_ids: 批量获取状态时预先取出的冷却中账号 id，见 is_available()
+        """
         cooldown_remaining = quota_manager.get_cooldown_remaining(self.id)
         creds = self.get_credentials()
         
+        # 凭证只取一次，过期检查直接复用，避免重复走 get_credentials()
         return {
             "id": self.id,
             "name": self.name,
             "enabled": self.enabled,
             "status": self.status.value,
-            "available": self.is_available(),
+            "available": self.is_available(cooling_ids),
             "request_count": self.request_count,
             "error_count": self.error_count,
+            "error_rate": self.error_rate,
             "cooldown_remaining": cooldown_remaining,
-            "token_expired": self.is_token_expired() if creds else None,
-            "token_expiring_soon": self.is_token_expiring_soon() if creds else None,
+            "token_expired": creds.is_expired() if creds else None,
+            "token_expiring_soon": creds.is_expiring_soon(10) if creds else None,
             "auth_method": creds.auth_method if creds else None,
             "has_refresh_token": bool(creds and creds.refresh_token),
             "idc_config_complete": bool(creds and creds.client_id and creds.client_secret) if creds and creds.auth_method == "idc" else None,
@@ -4,8 +4,9 @@ import shlex
 import shutil
 import subprocess
 import platform
+import time
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 
 @dataclass
@@ -17,6 +18,12 @@ class BrowserInfo:
     incognito_arg: str = ""
 
 
+# 浏览器检测结果缓存时间（秒）
+BROWSER_CACHE_TTL = 60
+
+# (检测时间 monotonic, 浏览器列表, id -> BrowserInfo)
+_browsers_cache: Optional[Tuple[float, List[BrowserInfo], Dict[str, BrowserInfo]]] = None
+
 # 浏览器配置
 BROWSER_CONFIGS = {
     "chrome": {
@@ -138,10 +145,24 @@ def detect_browsers() -> List[BrowserInfo]:
     return browsers
 
 
+def _get_browsers() -> Tuple[List[BrowserInfo], Dict[str, BrowserInfo]]:
+    """获取检测结果及 id 索引（短时缓存）
+    
+    登录流程通常先列出浏览器再立即打开 URL，缓存避免重复探测 PATH / 注册表，
+    按 id 查找也不必线性扫描。
+    """
+    global _browsers_cache
+    now = time.monotonic()
+    if _browsers_cache is None or now - _browsers_cache[0] > BROWSER_CACHE_TTL:
+        browsers = detect_browsers()
+        _browsers_cache = (now, browsers, {b.id: b for b in browsers})
+    return _browsers_cache[1], _browsers_cache[2]
+
+
 def open_url(url: str, browser_id: str = "default", incognito: bool = False) -> bool:
     """用指定浏览器打开 URL"""
-    browsers = detect_browsers()
-    browser = next((b for b in browsers if b.id == browser_id), None)
+    browsers, by_id = _get_browsers()
+    browser = by_id.get(browser_id)
     
     if not browser:
         # 降级到默认
@@ -182,5 +203,5 @@ def get_browsers_info() -> List[dict]:
             "name": b.name,
             "supports_incognito": b.supports_incognito,
         }
-        for b in detect_browsers()
+        for b in _get_browsers()[0]
     ]
@@ -21,7 +21,7 @@ class FlowState(str, Enum):
     ERROR = "error"          # 错误
 
 
-@dataclass
+@dataclass(slots=True)
 class Message:
     """消息"""
     role: str  # user/assistant/system/tool
@@ -30,7 +30,7 @@ class Message:
     tool_call_id: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class TokenUsage:
     """Token 使用量"""
     input_tokens: int = 0
@@ -41,9 +41,17 @@ class TokenUsage:
     @property
     def total_tokens(self) -> int:
         return self.input_tokens + self.output_tokens
+    
+    def to_dict(self) -> dict:
+        return {
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cache_read_tokens": self.cache_read_tokens,
+            "cache_write_tokens": self.cache_write_tokens,
+        }
 
 
-@dataclass
+@dataclass(slots=True)
 class FlowRequest:
     """请求数据"""
     method: str
@@ -61,7 +69,7 @@ class FlowRequest:
     temperature: float = 1.0
 
 
-@dataclass
+@dataclass(slots=True)
 class FlowResponse:
     """响应数据"""
     status_code: int
@@ -79,16 +87,24 @@ class FlowResponse:
     chunk_count: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class FlowError:
     """错误信息"""
     type: str  # rate_limit_error, api_error, etc.
     message: str
     status_code: int = 0
     raw: str = ""
+    
+    def to_dict(self) -> dict:
+        return {
+            "type": self.type,
+            "message": self.message,
+            "status_code": self.status_code,
+            "raw": self.raw,
+        }
 
 
-@dataclass 
+@dataclass(slots=True)
 class FlowTiming:
     """时间信息"""
     created_at: float = 0
@@ -110,7 +126,7 @@ class FlowTiming:
         return None
 
 
-@dataclass
+@dataclass(slots=True)
 class LLMFlow:
     """完整的 LLM 请求流"""
     id: str
@@ -177,11 +193,11 @@ class LLMFlow:
                 "has_tool_calls": bool(self.response.tool_calls),
                 "stop_reason": self.response.stop_reason,
                 "chunk_count": self.response.chunk_count,
-                "usage": asdict(self.response.usage),
+                "usage": self.response.usage.to_dict(),
             }
         
         if self.error:
-            d["error"] = asdict(self.error)
+            d["error"] = self.error.to_dict()
         
         return d
     
@@ -219,6 +235,12 @@ class FlowStore:
         self.total_flows = 0
         self.total_tokens_in = 0
         self.total_tokens_out = 0
+        # get_stats 结果缓存，Flow 增加或状态 / 用量变化时失效
+        self._stats_cache: Optional[dict] = None
+    
+    def invalidate_stats(self):
+        """统计相关字段变化后调用，下次 get_stats 重新计算"""
+        self._stats_cache = None
     
     def add(self, flow: LLMFlow):
         """添加 Flow"""
@@ -231,6 +253,7 @@ class FlowStore:
         self.flows.append(flow)
         self.flow_map[flow.id] = flow
         self.total_flows += 1
+        self._stats_cache = None
     
     def get(self, flow_id: str) -> Optional[LLMFlow]:
         """获取 Flow"""
@@ -243,6 +266,7 @@ class FlowStore:
             for k, v in kwargs.items():
                 if hasattr(flow, k):
                     setattr(flow, k, v)
+            self._stats_cache = None
     
     def query(
         self,
@@ -303,7 +327,10 @@ class FlowStore:
         return results[offset:offset + limit]
     
     def get_stats(self) -> dict:
-        """获取统计信息"""
+        """获取统计信息（Flow 无变化时直接返回缓存，调用方不要修改返回值）"""
+        if self._stats_cache is not None:
+            return self._stats_cache
+        
         completed = [f for f in self.flows if f.state == FlowState.COMPLETED]
         errors = [f for f in self.flows if f.state == FlowState.ERROR]
         
@@ -325,7 +352,7 @@ class FlowStore:
         durations = [f.timing.duration_ms for f in completed if f.timing.duration_ms]
         avg_duration = sum(durations) / len(durations) if durations else 0
         
-        return {
+        self._stats_cache = {
             "total_flows": self.total_flows,
             "active_flows": len(self.flows),
             "completed": len(completed),
@@ -336,6 +363,7 @@ class FlowStore:
             "total_tokens_out": self.total_tokens_out,
             "by_model": model_stats,
         }
+        return self._stats_cache
     
     def export_jsonl(self, flows: List[LLMFlow]) -> str:
         """导出为 JSONL 格式"""
@@ -464,6 +492,7 @@ class FlowMonitor:
         flow = self.store.get(flow_id)
         if flow:
             flow.state = FlowState.STREAMING
+            self.store.invalidate_stats()
             flow.timing.first_byte_at = time.time()
             if not flow.response:
                 flow.response = FlowResponse(status_code=200)
@@ -493,6 +522,7 @@ class FlowMonitor:
         
         flow.state = FlowState.COMPLETED
         flow.timing.completed_at = time.time()
+        self.store.invalidate_stats()
         
         if not flow.response:
             flow.response = FlowResponse(status_code=status_code)
@@ -516,6 +546,7 @@ class FlowMonitor:
         
         flow.state = FlowState.ERROR
         flow.timing.completed_at = time.time()
+        self.store.invalidate_stats()
         flow.error = FlowError(
             type=error_type,
             message=message,
@@ -6,21 +6,24 @@
 3. 错误重试 - 捕获错误后截断重试
 4. 预估检测 - 发送前预估并截断
 """
-import json
 import httpx
+import io
+import re
 import time
 from typing import List, Dict, Any, Tuple, Optional, Callable
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from collections import OrderedDict
+from itertools import islice
 from enum import Enum
 
+from ..logger import get_logger
 
-@dataclass
-class SummaryCacheEntry:
-    summary: str
-    old_history_count: int
-    old_history_chars: int
-    updated_at: float
+logger = get_logger("history_manager")
+
+
+# 摘要缓存条目: (summary, old_history_count, old_history_chars, updated_at)
+# 使用普通元组而非 dataclass，写入时不走 __init__ 也没有实例 __dict__
+SummaryCacheEntry = Tuple[str, int, int, float]
 
 
 class SummaryCache:
@@ -40,22 +43,22 @@ class SummaryCache:
         max_age_seconds: int
     ) -> Optional[str]:
         entry = self._entries.get(key)
-        if not entry:
+        if entry is None:
             return None
 
-        now = time.time()
-        if max_age_seconds > 0 and now - entry.updated_at > max_age_seconds:
-            self._entries.pop(key, None)
+        summary, cached_count, cached_chars, updated_at = entry
+        if max_age_seconds > 0 and time.time() - updated_at > max_age_seconds:
+            del self._entries[key]
             return None
 
-        if old_history_count - entry.old_history_count >= min_delta_messages:
+        if old_history_count - cached_count >= min_delta_messages:
             return None
 
-        if old_history_chars - entry.old_history_chars >= min_delta_chars:
+        if old_history_chars - cached_chars >= min_delta_chars:
             return None
 
         self._entries.move_to_end(key)
-        return entry.summary
+        return summary
 
     def set(
         self,
@@ -64,15 +67,11 @@ class SummaryCache:
         old_history_count: int,
         old_history_chars: int
     ):
-        self._entries[key] = SummaryCacheEntry(
-            summary=summary,
-            old_history_count=old_history_count,
-            old_history_chars=old_history_chars,
-            updated_at=time.time()
-        )
-        self._entries.move_to_end(key)
-        if len(self._entries) > self._max_entries:
-            self._entries.popitem(last=False)
+        entries = self._entries
+        entries[key] = (summary, old_history_count, old_history_chars, time.time())
+        entries.move_to_end(key)
+        if len(entries) > self._max_entries:
+            entries.popitem(last=False)
 
 
 class TruncateStrategy(str, Enum):
@@ -84,7 +83,7 @@ class TruncateStrategy(str, Enum):
     PRE_ESTIMATE = "pre_estimate"    # 预估检测
 
 
-@dataclass
+@dataclass(slots=True)
 class HistoryConfig:
     """历史消息配置"""
     # 启用的策略（可多选）
@@ -117,57 +116,117 @@ class HistoryConfig:
     add_warning_header: bool = True
     
     def to_dict(self) -> dict:
-        return {
-            "strategies": [s.value for s in self.strategies],
-            "max_messages": self.max_messages,
-            "max_chars": self.max_chars,
-            "summary_keep_recent": self.summary_keep_recent,
-            "summary_threshold": self.summary_threshold,
-            "summary_max_length": self.summary_max_length,
-            "retry_max_messages": self.retry_max_messages,
-            "max_retries": self.max_retries,
-            "estimate_threshold": self.estimate_threshold,
-            "chars_per_token": self.chars_per_token,
-            "summary_cache_enabled": self.summary_cache_enabled,
-            "summary_cache_min_delta_messages": self.summary_cache_min_delta_messages,
-            "summary_cache_min_delta_chars": self.summary_cache_min_delta_chars,
-            "summary_cache_max_age_seconds": self.summary_cache_max_age_seconds,
-            "add_warning_header": self.add_warning_header,
-        }
+        data = {name: getattr(self, name) for name in _HISTORY_CONFIG_FIELDS}
+        data["strategies"] = [s.value for s in self.strategies]
+        return data
     
     @classmethod
     def from_dict(cls, data: dict) -> "HistoryConfig":
-        strategies = [TruncateStrategy(s) for s in data.get("strategies", ["error_retry"])]
-        return cls(
-            strategies=strategies,
-            max_messages=data.get("max_messages", 30),
-            max_chars=data.get("max_chars", 150000),
-            summary_keep_recent=data.get("summary_keep_recent", 10),
-            summary_threshold=data.get("summary_threshold", 100000),
-            summary_max_length=data.get("summary_max_length", 2000),
-            retry_max_messages=data.get("retry_max_messages", 15),
-            max_retries=data.get("max_retries", 2),
-            estimate_threshold=data.get("estimate_threshold", 180000),
-            chars_per_token=data.get("chars_per_token", 3.0),
-            summary_cache_enabled=data.get("summary_cache_enabled", True),
-            summary_cache_min_delta_messages=data.get("summary_cache_min_delta_messages", 3),
-            summary_cache_min_delta_chars=data.get("summary_cache_min_delta_chars", 4000),
-            summary_cache_max_age_seconds=data.get("summary_cache_max_age_seconds", 180),
-            add_warning_header=data.get("add_warning_header", True),
-        )
+        kwargs = {name: data[name] for name in _HISTORY_CONFIG_FIELDS if name in data}
+        kwargs["strategies"] = [TruncateStrategy(s) for s in data.get("strategies", ["error_retry"])]
+        return cls(**kwargs)
+
+
+# 配置字段名（to_dict / from_dict 共用，缺省值以 dataclass 定义为准）
+_HISTORY_CONFIG_FIELDS = tuple(f.name for f in fields(HistoryConfig))
 
 
 _summary_cache = SummaryCache()
 
+# 单条消息长度缓存的条目上限，超过后在 reset() 时清空
+MSG_LEN_CACHE_MAX = 4096
+
+
+def _approx_json_chars(obj: Any) -> int:
+    """近似 len(json.dumps(obj, ensure_ascii=False))
+    
+    只遍历结构累加长度，不构造序列化字符串；忽略转义字符带来的少量偏差，
+    用于和字符数阈值比较已足够。
+    """
+    t = type(obj)
+    if t is str:
+        return len(obj) + 2
+    if t is dict:
+        # 花括号 + ", " 分隔符共 2n，每个键额外有引号与 ": "
+        total = 2 * len(obj) or 2
+        for k, v in obj.items():
+            total += (len(k) if type(k) is str else len(str(k))) + 4 + _approx_json_chars(v)
+        return total
+    if t is list or t is tuple:
+        total = 2 * len(obj) or 2
+        for v in obj:
+            total += _approx_json_chars(v)
+        return total
+    if obj is None or obj is True:
+        return 4
+    if obj is False:
+        return 5
+    if isinstance(obj, str):
+        return len(obj) + 2
+    if isinstance(obj, dict):
+        return _approx_json_chars(dict(obj))
+    if isinstance(obj, (list, tuple)):
+        return _approx_json_chars(list(obj))
+    return len(str(obj))
+
+
+def _extract_list_text(content: list) -> str:
+    texts = []
+    for item in content:
+        if isinstance(item, dict) and item.get("type") == "text":
+            texts.append(item.get("text", ""))
+        elif isinstance(item, str):
+            texts.append(item)
+    return "\n".join(texts)
+
+
+def _extract_dict_text(content: dict) -> str:
+    return content.get("text", "") or content.get("content", "")
+
+
+def _extract_other_text(content) -> str:
+    """非精确 str/list/dict 类型（子类或其它对象）的兜底提取"""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return _extract_list_text(content)
+    if isinstance(content, dict):
+        return _extract_dict_text(content)
+    return str(content) if content else ""
+
+
+# 按内容的精确类型分派文本提取函数，省去逐个 isinstance 判断
+_EXTRACT_TEXT = {
+    str: str.__str__,
+    list: _extract_list_text,
+    dict: _extract_dict_text,
+}
+
+
+def _without_user_context(msg: dict, uim: dict) -> dict:
+    """返回去掉 userInputMessageContext 的消息浅拷贝"""
+    return {**msg, "userInputMessage": {k: v for k, v in uim.items() if k != "userInputMessageContext"}}
+
 
 class HistoryManager:
     """历史消息管理器"""
     
+    # 每个请求创建一个实例，用 __slots__ 省去实例 __dict__
+    __slots__ = (
+        "config", "_truncated", "_truncate_info", "cache_key",
+        "_msg_len_cache", "_summary_line_cache",
+    )
+    
     def __init__(self, config: HistoryConfig = None, cache_key: Optional[str] = None):
         self.config = config or HistoryConfig()
         self._truncated = False
         self._truncate_info = ""
         self.cache_key = cache_key
+        # 单条消息序列化长度缓存: id(msg) -> (msg, chars)
+        # 同一请求内历史会被多次估算大小，持有 msg 引用以保证 id 不会被复用
+        self._msg_len_cache: Dict[int, Tuple[dict, int]] = {}
+        # 单条消息的摘要格式化行缓存（错误重试时会对重叠的旧历史反复生成摘要）
+        self._summary_line_cache: Dict[int, Tuple[dict, str]] = {}
     
     @property
     def was_truncated(self) -> bool:
@@ -183,6 +242,10 @@ class HistoryManager:
         """重置状态"""
         self._truncated = False
         self._truncate_info = ""
+        if len(self._msg_len_cache) > MSG_LEN_CACHE_MAX:
+            self._msg_len_cache.clear()
+        if len(self._summary_line_cache) > MSG_LEN_CACHE_MAX:
+            self._summary_line_cache.clear()
 
     def set_cache_key(self, cache_key: Optional[str]):
         """设置摘要缓存 key"""
@@ -197,18 +260,45 @@ class HistoryManager:
         """估算 token 数量"""
         return int(len(text) / self.config.chars_per_token)
     
+    def _msg_chars(self, msg: dict) -> int:
+        """单条消息的近似 JSON 字符数（带缓存）"""
+        cached = self._msg_len_cache.get(id(msg))
+        if cached is not None and cached[0] is msg:
+            return cached[1]
+        chars = _approx_json_chars(msg)
+        self._msg_len_cache[id(msg)] = (msg, chars)
+        return chars
+
+    def _history_chars(self, history: List[dict], end: Optional[int] = None) -> int:
+        """历史消息（或其前 end 条）的近似 JSON 字符数（各消息长度 + 方括号与 ", " 分隔符）"""
+        if end is None:
+            return sum(map(self._msg_chars, history)) + 2 * max(len(history), 1)
+        return sum(map(self._msg_chars, islice(history, end))) + 2 * max(end, 1)
+
+    def _history_exceeds(self, history: List[dict], limit: int, extra: int = 0) -> bool:
+        """历史消息近似字符数 + extra 是否超过 limit（一旦超过即停止累加）"""
+        total = extra + 2 * max(len(history), 1)
+        if total > limit:
+            return True
+        msg_chars = self._msg_chars
+        for msg in history:
+            total += msg_chars(msg)
+            if total > limit:
+                return True
+        return False
+    
     def estimate_history_size(self, history: List[dict]) -> Tuple[int, int]:
         """估算历史消息大小
         
         Returns:
             (message_count, char_count)
         """
-        char_count = len(json.dumps(history, ensure_ascii=False))
+        char_count = self._history_chars(history)
         return len(history), char_count
 
     def estimate_request_chars(self, history: List[dict], user_content: str = "") -> Tuple[int, int, int]:
         """估算请求字符数 (history_chars, user_chars, total_chars)"""
-        history_chars = len(json.dumps(history, ensure_ascii=False))
+        history_chars = self._history_chars(history)
         user_chars = len(user_content or "")
         return history_chars, user_chars, history_chars + user_chars
     
@@ -225,22 +315,23 @@ class HistoryManager:
     
     def truncate_by_chars(self, history: List[dict], max_chars: int) -> List[dict]:
         """按字符数截断"""
-        total_chars = len(json.dumps(history, ensure_ascii=False))
-        if total_chars <= max_chars:
+        if not self._history_exceeds(history, max_chars):
             return history
+        total_chars = self._history_chars(history)
         
         original_count = len(history)
-        # 从后往前保留
-        result = []
+        # 从后往前计算可保留的条数，最后一次切片（避免 list.insert(0) 的 O(N²) 移位）
+        keep = 0
         current_chars = 0
         
         for msg in reversed(history):
-            msg_chars = len(json.dumps(msg, ensure_ascii=False))
-            if current_chars + msg_chars > max_chars and result:
+            msg_chars = self._msg_chars(msg)
+            if current_chars + msg_chars > max_chars and keep:
                 break
-            result.insert(0, msg)
+            keep += 1
             current_chars += msg_chars
         
+        result = history[original_count - keep:]
         if len(result) < original_count:
             self._truncated = True
             self._truncate_info = f"按字符数截断: {original_count} -> {len(result)} 条消息 ({total_chars} -> {current_chars} 字符)"
@@ -249,40 +340,52 @@ class HistoryManager:
     
     def _extract_text(self, content) -> str:
         """从消息内容中提取文本"""
-        if isinstance(content, str):
-            return content
-        if isinstance(content, list):
-            texts = []
-            for item in content:
-                if isinstance(item, dict) and item.get("type") == "text":
-                    texts.append(item.get("text", ""))
-                elif isinstance(item, str):
-                    texts.append(item)
-            return "\n".join(texts)
-        if isinstance(content, dict):
-            return content.get("text", "") or content.get("content", "")
-        return str(content) if content else ""
+        return _EXTRACT_TEXT.get(type(content), _extract_other_text)(content)
     
-    def _format_history_for_summary(self, history: List[dict]) -> str:
-        """格式化历史消息用于生成摘要"""
-        lines = []
-        for msg in history:
-            role = "unknown"
-            content = ""
-            if "userInputMessage" in msg:
-                role = "user"
-                content = msg.get("userInputMessage", {}).get("content", "")
-            elif "assistantResponseMessage" in msg:
-                role = "assistant"
-                content = msg.get("assistantResponseMessage", {}).get("content", "")
-            else:
-                role = msg.get("role", "unknown")
-                content = self._extract_text(msg.get("content", ""))
-            # 截断过长的单条消息
-            if len(content) > 500:
-                content = content[:500] + "..."
-            lines.append(f"[{role}]: {content}")
-        return "\n".join(lines)
+    def _summary_line(self, msg: dict) -> str:
+        """格式化单条消息用于生成摘要（带缓存）"""
+        cached = self._summary_line_cache.get(id(msg))
+        if cached is not None and cached[0] is msg:
+            return cached[1]
+        role = "unknown"
+        content = ""
+        if "userInputMessage" in msg:
+            role = "user"
+            content = msg.get("userInputMessage", {}).get("content", "")
+        elif "assistantResponseMessage" in msg:
+            role = "assistant"
+            content = msg.get("assistantResponseMessage", {}).get("content", "")
+        else:
+            role = msg.get("role", "unknown")
+            content = self._extract_text(msg.get("content", ""))
+        # 截断过长的单条消息
+        if len(content) > 500:
+            content = content[:500] + "..."
+        line = f"[{role}]: {content}"
+        self._summary_line_cache[id(msg)] = (msg, line)
+        return line
+
+    def _format_history_for_summary(
+        self,
+        history: List[dict],
+        max_chars: Optional[int] = None,
+        end: Optional[int] = None
+    ) -> str:
+        """格式化历史消息用于生成摘要
+        
+        Args:
+            max_chars: 结果超过该长度后不再格式化后续消息（调用方负责最终截断）
+            end: 只格式化 history[:end]，避免调用方切片复制
+        """
+        buf = io.StringIO()
+        sep = ""
+        for msg in islice(history, end):
+            buf.write(sep)
+            buf.write(self._summary_line(msg))
+            sep = "\n"
+            if max_chars is not None and buf.tell() > max_chars:
+                break
+        return buf.getvalue()
 
     def _entry_kind(self, msg: dict) -> str:
         """提取消息类型"""
@@ -302,32 +405,39 @@ class HistoryManager:
         if not history:
             return "len=0"
 
-        kinds = [self._entry_kind(msg) for msg in history]
-        counts = {"U": 0, "A": 0, "?": 0}
-        for k in kinds:
-            counts[k] = counts.get(k, 0) + 1
+        total = len(history)
+        if total <= max_items:
+            head_len = tail_start = total
+        else:
+            head_len = max_items // 2
+            tail_start = total - (max_items - head_len)
 
+        # 单次遍历同时完成计数、交替检查与 tool 统计；序列只保留首尾用于展示
+        counts = {"U": 0, "A": 0, "?": 0}
+        head: List[str] = []
+        tail: List[str] = []
         alternating = True
-        for i in range(1, len(kinds)):
-            if kinds[i] == kinds[i - 1] or kinds[i] == "?" or kinds[i - 1] == "?":
-                alternating = False
-                break
-
+        prev = None
         tool_uses = 0
         tool_results = 0
-        for msg in history:
+        for i, msg in enumerate(history):
+            kind = self._entry_kind(msg)
+            counts[kind] += 1
+            if prev is not None and (kind == prev or kind == "?" or prev == "?"):
+                alternating = False
+            prev = kind
+            if i < head_len:
+                head.append(kind)
+            elif i >= tail_start:
+                tail.append(kind)
+
             if "assistantResponseMessage" in msg:
                 tool_uses += len(msg["assistantResponseMessage"].get("toolUses", []) or [])
             if "userInputMessage" in msg:
                 ctx = msg["userInputMessage"].get("userInputMessageContext", {})
                 tool_results += len(ctx.get("toolResults", []) or [])
 
-        if len(kinds) <= max_items:
-            seq = "".join(kinds)
-        else:
-            head_len = max_items // 2
-            tail_len = max_items - head_len
-            seq = f"{''.join(kinds[:head_len])}...{''.join(kinds[-tail_len:])}"
+        seq = "".join(head) if total <= max_items else f"{''.join(head)}...{''.join(tail)}"
 
         return (
             f"len={len(history)} seq={seq} alt={'yes' if alternating else 'no'} "
@@ -335,6 +445,12 @@ class HistoryManager:
             f"tool_uses={tool_uses} tool_results={tool_results}"
         )
 
+    def _log_structure(self, label: str, history: List[dict]):
+        """以 DEBUG 级别输出历史结构；lazy 模式下未启用 DEBUG 时不会计算结构摘要"""
+        logger.opt(lazy=True).debug(
+            "{}: {}", lambda: label, lambda: self.summarize_history_structure(history)
+        )
+
     def _build_summary_history(
         self,
         summary: str,
@@ -349,68 +465,66 @@ class HistoryManager:
         3. 当 assistant 有 toolUses 时，下一条 user 必须有对应的 toolResults
         4. 当 assistant 没有 toolUses 时，下一条 user 不能有 toolResults
         """
-        if any("userInputMessage" in h or "assistantResponseMessage" in h for h in recent_history):
-            # 如果 recent_history 以 assistant 开头，跳过它
-            if recent_history and "assistantResponseMessage" in recent_history[0]:
-                recent_history = recent_history[1:]
-
-            # 收集所有 toolUse IDs（用于后续验证）
-            tool_use_ids = set()
-            for msg in recent_history:
-                if "assistantResponseMessage" in msg:
-                    for tu in msg["assistantResponseMessage"].get("toolUses", []) or []:
-                        tu_id = tu.get("toolUseId")
-                        if tu_id:
-                            tool_use_ids.add(tu_id)
-
-            # 检查 recent_history 的第一条消息
-            first_user_has_tool_results = False
-            if recent_history and "userInputMessage" in recent_history[0]:
-                ctx = recent_history[0].get("userInputMessage", {}).get("userInputMessageContext", {})
-                first_user_has_tool_results = bool(ctx.get("toolResults"))
-            
-            # 如果第一条 user 消息有 toolResults，需要清除它
-            # 因为摘要后的 assistant 占位消息没有 toolUses
-            if first_user_has_tool_results:
-                recent_history[0]["userInputMessage"].pop("userInputMessageContext", None)
-
-            # 过滤孤立的 toolResults（没有对应 toolUse）
-            # 重新收集 tool_use_ids（因为可能已经修改了 recent_history）
-            tool_use_ids = set()
-            for msg in recent_history:
-                if "assistantResponseMessage" in msg:
-                    for tu in msg["assistantResponseMessage"].get("toolUses", []) or []:
-                        tu_id = tu.get("toolUseId")
-                        if tu_id:
-                            tool_use_ids.add(tu_id)
-
-            if tool_use_ids:
-                for msg in recent_history:
-                    if "userInputMessage" in msg:
-                        ctx = msg.get("userInputMessage", {}).get("userInputMessageContext", {})
-                        results = ctx.get("toolResults")
-                        if results:
-                            filtered = [r for r in results if r.get("toolUseId") in tool_use_ids]
-                            if filtered:
-                                ctx["toolResults"] = filtered
-                            else:
-                                ctx.pop("toolResults", None)
-                            if not ctx:
-                                msg["userInputMessage"].pop("userInputMessageContext", None)
-            else:
-                # 没有任何 toolUses，清除所有 toolResults
-                for msg in recent_history:
-                    if "userInputMessage" in msg:
-                        msg["userInputMessage"].pop("userInputMessageContext", None)
+        # 第一遍：识别格式、收集 toolUse IDs、定位最后一条消息（用于取 modelId）
+        # 如果 recent_history 以 assistant 开头，跳过它
+        start = 1 if recent_history and "assistantResponseMessage" in recent_history[0] else 0
+        is_kiro_format = start == 1
+        tool_use_ids = set()
+        last_entry = None
+        for i, msg in enumerate(recent_history):
+            arm = msg.get("assistantResponseMessage")
+            if arm is not None:
+                is_kiro_format = True
+                if i < start:
+                    continue
+                last_entry = msg
+                for tu in arm.get("toolUses") or []:
+                    tu_id = tu.get("toolUseId")
+                    if tu_id:
+                        tool_use_ids.add(tu_id)
+            elif "userInputMessage" in msg:
+                is_kiro_format = True
+                last_entry = msg
+
+        if is_kiro_format:
+            # 第二遍：清理 toolResults。调用方的消息不做原地修改，需要改动的消息浅拷贝后替换
+            cleaned = []
+            for i in range(start, len(recent_history)):
+                msg = recent_history[i]
+                uim = msg.get("userInputMessage")
+                if uim is None or "userInputMessageContext" not in uim:
+                    cleaned.append(msg)
+                    continue
+                ctx = uim["userInputMessageContext"] or {}
+                results = ctx.get("toolResults")
+                # 第一条 user 消息有 toolResults 时需要清除上下文，因为摘要后的 assistant 占位消息没有 toolUses；
+                # 没有任何 toolUses 时清除所有 toolResults
+                if (i == start and results) or not tool_use_ids:
+                    cleaned.append(_without_user_context(msg, uim))
+                    continue
+                if not results:
+                    cleaned.append(msg)
+                    continue
+                # 过滤孤立的 toolResults（没有对应 toolUse）
+                filtered = [r for r in results if r.get("toolUseId") in tool_use_ids]
+                if len(filtered) == len(results):
+                    cleaned.append(msg)
+                    continue
+                new_ctx = {k: v for k, v in ctx.items() if k != "toolResults"}
+                if filtered:
+                    new_ctx["toolResults"] = filtered
+                if new_ctx:
+                    cleaned.append({**msg, "userInputMessage": {**uim, "userInputMessageContext": new_ctx}})
+                else:
+                    cleaned.append(_without_user_context(msg, uim))
+            recent_history = cleaned
 
             model_id = "claude-sonnet-4"
-            for msg in reversed(recent_history):
-                if "userInputMessage" in msg:
-                    model_id = msg["userInputMessage"].get("modelId", model_id)
-                    break
-                if "assistantResponseMessage" in msg:
-                    model_id = msg["assistantResponseMessage"].get("modelId", model_id)
-                    break
+            if last_entry is not None:
+                if "userInputMessage" in last_entry:
+                    model_id = last_entry["userInputMessage"].get("modelId", model_id)
+                else:
+                    model_id = last_entry["assistantResponseMessage"].get("modelId", model_id)
 
             summary_msg = {
                 "userInputMessage": {
@@ -428,7 +542,7 @@ class HistoryManager:
             })
             result.extend(recent_history)
             if debug_label:
-                print(f"[HistoryManager] {debug_label}: {self.summarize_history_structure(result)}")
+                self._log_structure(debug_label, result)
             return result
 
         summary_msg = {
@@ -442,23 +556,29 @@ class HistoryManager:
         })
         result.extend(recent_history)
         if debug_label:
-            print(f"[HistoryManager] {debug_label}: {self.summarize_history_structure(result)}")
+            self._log_structure(debug_label, result)
         return result
     
-    async def generate_summary(self, history: List[dict], api_caller: Callable) -> Optional[str]:
+    async def generate_summary(
+        self,
+        history: List[dict],
+        api_caller: Callable,
+        end: Optional[int] = None
+    ) -> Optional[str]:
         """生成历史消息摘要
         
         Args:
             history: 需要摘要的历史消息
             api_caller: API 调用函数，签名为 async (prompt: str) -> str
+            end: 只摘要 history[:end]（旧历史前缀），不传则摘要全部
         
         Returns:
             摘要文本，失败返回 None
         """
-        if not history:
+        if not history or end is not None and end <= 0:
             return None
         
-        formatted = self._format_history_for_summary(history)
+        formatted = self._format_history_for_summary(history, max_chars=10000, end=end)
         # 限制输入长度
         if len(formatted) > 10000:
             formatted = formatted[:10000] + "\n...(truncated)"
@@ -479,7 +599,7 @@ class HistoryManager:
                 summary = summary[:self.config.summary_max_length] + "..."
             return summary
         except Exception as e:
-            print(f"[HistoryManager] 生成摘要失败: {e}")
+            logger.warning(f"生成摘要失败: {e}")
             return None
     
     async def compress_with_summary(
@@ -496,20 +616,19 @@ class HistoryManager:
         Returns:
             压缩后的历史消息
         """
-        total_chars = len(json.dumps(history, ensure_ascii=False))
-        if total_chars <= self.config.summary_threshold:
+        if len(history) <= self.config.summary_keep_recent:
             return history
         
-        if len(history) <= self.config.summary_keep_recent:
+        if not self._history_exceeds(history, self.config.summary_threshold):
             return history
         
         # 分离早期消息和最近消息
         keep_recent = self.config.summary_keep_recent
-        old_history = history[:-keep_recent]
-        recent_history = history[-keep_recent:]
+        split = len(history) - keep_recent
+        recent_history = history[split:]
         
-        # 生成摘要
-        summary = await self.generate_summary(old_history, api_caller)
+        # 生成摘要（旧历史按前缀下标传入，不再切片复制）
+        summary = await self.generate_summary(history, api_caller, end=split)
         
         if not summary:
             # 摘要失败，回退到简单截断
@@ -542,10 +661,10 @@ class HistoryManager:
         if keep_recent <= 0:
             return history
 
-        old_history = history[:-keep_recent]
-        recent_history = history[-keep_recent:]
+        split = len(history) - keep_recent
+        recent_history = history[split:]
 
-        summary = await self.generate_summary(old_history, api_caller)
+        summary = await self.generate_summary(history, api_caller, end=split)
         if not summary:
             return history
 
@@ -556,6 +675,40 @@ class HistoryManager:
         
         return result
 
+    async def _summarize_for_retry(
+        self,
+        history: List[dict],
+        target_count: int,
+        api_caller: Callable
+    ) -> Tuple[Optional[str], bool]:
+        """摘要错误重试时要丢弃的旧历史 history[:-target_count]，优先复用摘要缓存
+        
+        Returns:
+            (summary, from_cache)
+        """
+        old_count = len(history) - target_count
+        cache_key = self._summary_cache_key(target_count)
+        if not cache_key or not self.config.summary_cache_enabled:
+            return await self.generate_summary(history, api_caller, end=old_count), False
+
+        # 缓存校验只需旧历史条数与字符数，字符数来自单条消息长度缓存，无需序列化
+        old_chars = self._history_chars(history, old_count)
+        cached = _summary_cache.get(
+            cache_key,
+            old_count,
+            old_chars,
+            self.config.summary_cache_min_delta_messages,
+            self.config.summary_cache_min_delta_chars,
+            self.config.summary_cache_max_age_seconds
+        )
+        if cached:
+            return cached, True
+
+        summary = await self.generate_summary(history, api_caller, end=old_count)
+        if summary:
+            _summary_cache.set(cache_key, summary, old_count, old_chars)
+        return summary, False
+
     async def handle_length_error_async(
         self,
         history: List[dict],
@@ -590,34 +743,18 @@ class HistoryManager:
             return history, False
 
         if api_caller:
-            old_history = history[:-target_count]
-            recent_history = history[-target_count:]
-            cache_key = self._summary_cache_key(target_count)
-            old_count = len(old_history)
-            old_chars = len(json.dumps(old_history, ensure_ascii=False))
-            cached = None
-            if cache_key and self.config.summary_cache_enabled:
-                cached = _summary_cache.get(
-                    cache_key,
-                    old_count,
-                    old_chars,
-                    self.config.summary_cache_min_delta_messages,
-                    self.config.summary_cache_min_delta_chars,
-                    self.config.summary_cache_max_age_seconds
-                )
-            if cached:
-                result = self._build_summary_history(cached, recent_history, "错误重试摘要缓存结构")
+            recent_history = history[len(history) - target_count:]
+            summary, from_cache = await self._summarize_for_retry(history, target_count, api_caller)
+            if from_cache:
+                result = self._build_summary_history(summary, recent_history, "错误重试摘要缓存结构")
                 self._truncated = True
                 self._truncate_info = f"错误重试摘要(缓存) (第 {retry_count + 1} 次): {len(history)} -> {len(result)} 条消息"
                 return result, True
 
-            summary = await self.generate_summary(old_history, api_caller)
             if summary:
                 result = self._build_summary_history(summary, recent_history, "错误重试摘要结构")
                 self._truncated = True
                 self._truncate_info = f"错误重试摘要 (第 {retry_count + 1} 次): {len(history)} -> {len(result)} 条消息 (摘要 {len(summary)} 字符)"
-                if cache_key and self.config.summary_cache_enabled:
-                    _summary_cache.set(cache_key, summary, old_count, old_chars)
                 return result, True
 
         # 摘要失败或无 api_caller，回退到按数量截断
@@ -634,8 +771,7 @@ class HistoryManager:
         if TruncateStrategy.PRE_ESTIMATE not in self.config.strategies:
             return False
         
-        total_chars = len(json.dumps(history, ensure_ascii=False)) + len(user_content)
-        return total_chars > self.config.estimate_threshold
+        return self._history_exceeds(history, self.config.estimate_threshold, len(user_content))
     
     def should_summarize(self, history: List[dict]) -> bool:
         """检查是否需要摘要（智能摘要或自动截断前摘要）"""
@@ -647,16 +783,18 @@ class HistoryManager:
             return False
         if not history:
             return False
-        _, _, total_chars = self.estimate_request_chars(history, user_content)
-        return total_chars > self.config.estimate_threshold
+        return self._history_exceeds(history, self.config.estimate_threshold, len(user_content or ""))
 
     def should_smart_summarize(self, history: List[dict]) -> bool:
         """检查是否需要智能摘要"""
         if TruncateStrategy.SMART_SUMMARY not in self.config.strategies:
             return False
 
-        total_chars = len(json.dumps(history, ensure_ascii=False))
-        return total_chars > self.config.summary_threshold and len(history) > self.config.summary_keep_recent
+        # 先做 O(1) 的数量判断，再按需累加字符数
+        return (
+            len(history) > self.config.summary_keep_recent
+            and self._history_exceeds(history, self.config.summary_threshold)
+        )
 
     def should_auto_truncate_summarize(self, history: List[dict]) -> bool:
         """检查是否需要自动截断前摘要"""
@@ -666,8 +804,7 @@ class HistoryManager:
         if len(history) <= 1:
             return False
 
-        total_chars = len(json.dumps(history, ensure_ascii=False))
-        return len(history) > self.config.max_messages or total_chars > self.config.max_chars
+        return len(history) > self.config.max_messages or self._history_exceeds(history, self.config.max_chars)
     
     def pre_process(self, history: List[dict], user_content: str = "") -> List[dict]:
         """预处理历史消息（发送前，同步版本）
@@ -690,8 +827,7 @@ class HistoryManager:
         
         # 策略 4: 预估检测
         if TruncateStrategy.PRE_ESTIMATE in self.config.strategies:
-            total_chars = len(json.dumps(result, ensure_ascii=False)) + len(user_content)
-            if total_chars > self.config.estimate_threshold:
+            if self._history_exceeds(result, self.config.estimate_threshold, len(user_content)):
                 # 计算需要保留的消息数
                 target_chars = int(self.config.estimate_threshold * 0.8)  # 留 20% 余量
                 result = self.truncate_by_chars(result, target_chars)
@@ -724,35 +860,18 @@ class HistoryManager:
             if self.should_pre_summary_for_error_retry(result, user_content):
                 target_count = self.config.retry_max_messages
                 if len(result) > target_count:
-                    old_history = result[:-target_count]
-                    recent_history = result[-target_count:]
-                    cache_key = self._summary_cache_key(target_count)
-                    old_count = len(old_history)
-                    old_chars = len(json.dumps(old_history, ensure_ascii=False))
-                    cached = None
-                    if cache_key and self.config.summary_cache_enabled:
-                        cached = _summary_cache.get(
-                            cache_key,
-                            old_count,
-                            old_chars,
-                            self.config.summary_cache_min_delta_messages,
-                            self.config.summary_cache_min_delta_chars,
-                            self.config.summary_cache_max_age_seconds
-                        )
-                    if cached:
-                        result = self._build_summary_history(cached, recent_history, "错误重试预摘要缓存结构")
+                    recent_history = result[len(result) - target_count:]
+                    summary, from_cache = await self._summarize_for_retry(result, target_count, api_caller)
+                    if from_cache:
+                        result = self._build_summary_history(summary, recent_history, "错误重试预摘要缓存结构")
                         self._truncated = True
                         self._truncate_info = f"错误重试预摘要(缓存): {len(history)} -> {len(result)} 条消息"
                         pre_summarized = True
-                    else:
-                        summary = await self.generate_summary(old_history, api_caller)
-                        if summary:
-                            result = self._build_summary_history(summary, recent_history, "错误重试预摘要结构")
-                            self._truncated = True
-                            self._truncate_info = f"错误重试预摘要: {len(history)} -> {len(result)} 条消息 (摘要 {len(summary)} 字符)"
-                            pre_summarized = True
-                            if cache_key and self.config.summary_cache_enabled:
-                                _summary_cache.set(cache_key, summary, old_count, old_chars)
+                    elif summary:
+                        result = self._build_summary_history(summary, recent_history, "错误重试预摘要结构")
+                        self._truncated = True
+                        self._truncate_info = f"错误重试预摘要: {len(history)} -> {len(result)} 条消息 (摘要 {len(summary)} 字符)"
+                        pre_summarized = True
         
         # 策略 2: 智能摘要（优先级最高）
         summary_applied = False
@@ -778,8 +897,7 @@ class HistoryManager:
         
         # 策略 4: 预估检测
         if TruncateStrategy.PRE_ESTIMATE in self.config.strategies:
-            total_chars = len(json.dumps(result, ensure_ascii=False)) + len(user_content)
-            if total_chars > self.config.estimate_threshold:
+            if self._history_exceeds(result, self.config.estimate_threshold, len(user_content)):
                 target_chars = int(self.config.estimate_threshold * 0.8)
                 result = self.truncate_by_chars(result, target_chars)
         
@@ -843,14 +961,15 @@ def update_history_config(data: dict):
     _history_config = HistoryConfig.from_dict(data)
 
 
+# 内容长度超限错误的宽松匹配："too long" 且提到 input/content/message（不区分大小写）
+# 预编译后直接扫描原字符串，不再为 lower() 分配新串
+_TOO_LONG_RE = re.compile(r"too long", re.IGNORECASE)
+_LENGTH_SUBJECT_RE = re.compile(r"input|content|message", re.IGNORECASE)
+
+
 def is_content_length_error(status_code: int, error_text: str) -> bool:
     """检查是否为内容长度超限错误"""
     if "CONTENT_LENGTH_EXCEEDS_THRESHOLD" in error_text:
         return True
-    if "Input is too long" in error_text:
-        return True
-    # 更宽松的匹配
-    lowered = error_text.lower()
-    if "too long" in lowered and ("input" in lowered or "content" in lowered or "message" in lowered):
-        return True
-    return False
+    # "Input is too long" 也由下面的宽松匹配覆盖
+    return bool(_TOO_LONG_RE.search(error_text) and _LENGTH_SUBJECT_RE.search(error_text))
@@ -1,16 +1,44 @@
 """配置持久化"""
-import json
+import os
 from pathlib import Path
 from typing import List, Dict, Any
 
+from .. import json_codec
+from ..logger import get_logger
+
+logger = get_logger("persistence")
+
 # 配置文件路径
 CONFIG_DIR = Path.home() / ".kiro-proxy"
 CONFIG_FILE = CONFIG_DIR / "config.json"
+# 写盘用的路径字符串只算一次
+_CONFIG_FILE_STR = str(CONFIG_FILE)
+_CONFIG_TEMP_FILE = _CONFIG_FILE_STR + ".tmp"
+
+# 配置目录创建一次后即缓存，避免每次保存都发起 mkdir 系统调用
+_config_dir_ensured = False
 
 
 def ensure_config_dir():
     """确保配置目录存在"""
+    global _config_dir_ensured
+    if _config_dir_ensured:
+        return
     CONFIG_DIR.mkdir(parents=True, exist_ok=True)
+    _config_dir_ensured = True
+
+
+def _write_config(config: Dict[str, Any]):
+    """序列化后先写临时文件再原子替换，避免写到一半时进程退出导致配置损坏"""
+    data = json_codec.dumps(config, indent=True)
+    fd = os.open(_CONFIG_TEMP_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+    os.replace(_CONFIG_TEMP_FILE, _CONFIG_FILE_STR)
 
 
 def save_accounts(accounts: List[Dict[str, Any]]) -> bool:
@@ -19,11 +47,10 @@ def save_accounts(accounts: List[Dict[str, Any]]) -> bool:
         ensure_config_dir()
         config = load_config()
         config["accounts"] = accounts
-        with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-            json.dump(config, f, indent=2, ensure_ascii=False)
+        _write_config(config)
         return True
     except Exception as e:
-        print(f"[Persistence] 保存配置失败: {e}")
+        logger.error(f"保存配置失败: {e}")
         return False
 
 
@@ -37,10 +64,9 @@ def load_config() -> Dict[str, Any]:
     """加载完整配置"""
     try:
         if CONFIG_FILE.exists():
-            with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
+            return json_codec.loads(CONFIG_FILE.read_bytes())
     except Exception as e:
-        print(f"[Persistence] 加载配置失败: {e}")
+        logger.error(f"加载配置失败: {e}")
     return {}
 
 
@@ -48,11 +74,10 @@ def save_config(config: Dict[str, Any]) -> bool:
     """保存完整配置"""
     try:
         ensure_config_dir()
-        with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-            json.dump(config, f, indent=2, ensure_ascii=False)
+        _write_config(config)
         return True
     except Exception as e:
-        print(f"[Persistence] 保存配置失败: {e}")
+        logger.error(f"保存配置失败: {e}")
         return False
 
 
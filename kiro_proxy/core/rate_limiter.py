@@ -31,17 +31,39 @@ class RateLimitConfig:
     quota_cooldown_seconds: int = 30
 
 
-@dataclass
+# 限速统计窗口（秒）：每分钟请求数
+RATE_WINDOW_SECONDS = 60
+
+
+def _prune_window(times: deque, now: float) -> int:
+    """丢弃限速窗口外的旧记录，返回窗口内的请求数
+    
+    times 按追加顺序递增，从左侧弹出过期记录，剩下的都在窗口内，
+    每条记录只会被弹出一次，不必每次全量扫描。窗口固定为 RATE_WINDOW_SECONDS，
+    只供限速器内部使用，避免更短的窗口误删仍在 60 秒内的记录。
+    """
+    cutoff = now - RATE_WINDOW_SECONDS
+    while times and times[0] <= cutoff:
+        times.popleft()
+    return len(times)
+
+
+@dataclass(slots=True)
 class AccountRateState:
     """账号限速状态"""
-    last_request_time: float = 0
+    last_request_time: float = 0  # time.monotonic()，只用于计算间隔
     request_times: deque = field(default_factory=lambda: deque(maxlen=100))
     
     def get_requests_in_window(self, window_seconds: int = 60) -> int:
-        """获取时间窗口内的请求数"""
-        now = time.time()
-        cutoff = now - window_seconds
-        return sum(1 for t in self.request_times if t > cutoff)
+        """获取时间窗口内的请求数（只读，不修改记录）"""
+        cutoff = time.monotonic() - window_seconds
+        count = 0
+        # 记录按时间递增，从最新一条往前数到窗口边界即可
+        for t in reversed(self.request_times):
+            if t <= cutoff:
+                break
+            count += 1
+        return count
 
 
 class RateLimiter:
@@ -54,9 +76,10 @@ class RateLimiter:
     
     def _get_account_state(self, account_id: str) -> AccountRateState:
         """获取账号状态"""
-        if account_id not in self._account_states:
-            self._account_states[account_id] = AccountRateState()
-        return self._account_states[account_id]
+        state = self._account_states.get(account_id)
+        if state is None:
+            state = self._account_states.setdefault(account_id, AccountRateState())
+        return state
     
     def can_request(self, account_id: str) -> tuple:
         """检查是否可以发送请求
@@ -67,7 +90,7 @@ class RateLimiter:
         if not self.config.enabled:
             return True, 0, None
         
-        now = time.time()
+        now = time.monotonic()
         state = self._get_account_state(account_id)
         
         # 检查最小请求间隔
@@ -77,12 +100,12 @@ class RateLimiter:
             return False, wait, f"请求过快，请等待 {wait:.1f} 秒"
         
         # 检查每账号每分钟限制
-        account_rpm = state.get_requests_in_window(60)
+        account_rpm = _prune_window(state.request_times, now)
         if account_rpm >= self.config.max_requests_per_minute:
             return False, 2, f"账号请求过于频繁 ({account_rpm}/分钟)"
         
         # 检查全局每分钟限制
-        global_rpm = sum(1 for t in self._global_requests if t > now - 60)
+        global_rpm = _prune_window(self._global_requests, now)
         if global_rpm >= self.config.global_max_requests_per_minute:
             return False, 1, f"全局请求过于频繁 ({global_rpm}/分钟)"
         
@@ -90,7 +113,7 @@ class RateLimiter:
     
     def record_request(self, account_id: str):
         """记录请求"""
-        now = time.time()
+        now = time.monotonic()
         state = self._get_account_state(account_id)
         state.last_request_time = now
         state.request_times.append(now)
@@ -106,14 +129,14 @@ class RateLimiter:
     
     def get_stats(self) -> dict:
         """获取统计信息"""
-        now = time.time()
+        now = time.monotonic()
         return {
             "enabled": self.config.enabled,
-            "global_rpm": sum(1 for t in self._global_requests if t > now - 60),
+            "global_rpm": _prune_window(self._global_requests, now),
             "quota_cooldown_seconds": self.config.quota_cooldown_seconds,
             "accounts": {
                 aid: {
-                    "rpm": state.get_requests_in_window(60),
+                    "rpm": _prune_window(state.request_times, now),
                     "last_request": now - state.last_request_time if state.last_request_time else None
                 }
                 for aid, state in self._account_states.items()
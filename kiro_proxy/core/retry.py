@@ -2,11 +2,12 @@
 
 Provides:
 - Retryable error detection (by status code and exception type)
-- Async retry with exponential backoff
+- Async retry with jittered exponential backoff
 - Circuit breaker pattern with probabilistic recovery
 """
 import asyncio
 import random
+import re
 import time
 from typing import Callable, Any, Optional, Set
 
@@ -14,6 +15,7 @@ from ..logger import get_logger
 from ..env_config import (
     MAX_RETRIES,
     BASE_RETRY_DELAY,
+    MAX_RETRY_DELAY,
     CIRCUIT_BREAKER_RECOVERY_TIMEOUT,
     CIRCUIT_BREAKER_MAX_BACKOFF,
     CIRCUIT_BREAKER_RETRY_CHANCE,
@@ -31,6 +33,9 @@ RETRYABLE_STATUS_CODES: Set[int] = {
     504,  # Gateway Timeout
 }
 
+# Exception class names that indicate a transient network failure
+_NETWORK_ERROR_RE = re.compile(r"timeout|connect|network|reset", re.IGNORECASE)
+
 # Non-retryable status codes (return error immediately)
 NON_RETRYABLE_STATUS_CODES: Set[int] = {
     400,  # Bad Request
@@ -42,10 +47,8 @@ NON_RETRYABLE_STATUS_CODES: Set[int] = {
 
 def is_retryable_error(status_code: Optional[int], error: Optional[Exception] = None) -> bool:
     """Determine if an error is retryable."""
-    if error:
-        error_name = type(error).__name__.lower()
-        if any(kw in error_name for kw in ['timeout', 'connect', 'network', 'reset']):
-            return True
+    if error and _NETWORK_ERROR_RE.search(type(error).__name__):
+        return True
 
     if status_code and status_code in RETRYABLE_STATUS_CODES:
         return True
@@ -62,11 +65,20 @@ def is_non_retryable_error(status_code: Optional[int]) -> bool:
     return status_code in NON_RETRYABLE_STATUS_CODES if status_code else False
 
 
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """Exponential backoff with full jitter.
+
+    Picks a random delay in [0, min(max_delay, base_delay * 2**attempt)] so
+    concurrent requests that failed together don't retry in lockstep.
+    """
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
 async def retry_async(
     func: Callable,
     max_retries: int = MAX_RETRIES,
     base_delay: float = BASE_RETRY_DELAY,
-    max_delay: float = 10.0,
+    max_delay: float = MAX_RETRY_DELAY,
     on_retry: Optional[Callable[[int, Exception], None]] = None
 ) -> Any:
     """Async retry with exponential backoff.
@@ -91,7 +103,7 @@ async def retry_async(
                 raise
 
             if attempt < max_retries and is_retryable_error(status_code, e):
-                delay = min(base_delay * (2 ** attempt), max_delay)
+                delay = backoff_delay(attempt, base_delay, max_delay)
 
                 if on_retry:
                     on_retry(attempt + 1, e)
@@ -111,9 +123,15 @@ async def retry_async(
 class RetryableRequest:
     """Retryable request context."""
 
-    def __init__(self, max_retries: int = MAX_RETRIES, base_delay: float = BASE_RETRY_DELAY):
+    def __init__(
+        self,
+        max_retries: int = MAX_RETRIES,
+        base_delay: float = BASE_RETRY_DELAY,
+        max_delay: float = MAX_RETRY_DELAY,
+    ):
         self.max_retries = max_retries
         self.base_delay = base_delay
+        self.max_delay = max_delay
         self.attempt = 0
         self.last_error = None
 
@@ -131,8 +149,8 @@ class RetryableRequest:
         return is_retryable_error(status_code, error)
 
     async def wait(self):
-        """Wait with exponential backoff."""
-        delay = min(self.base_delay * (2 ** (self.attempt - 1)), 10.0)
+        """Wait with jittered exponential backoff."""
+        delay = backoff_delay(self.attempt - 1, self.base_delay, self.max_delay)
         logger.info(f"Retry {self.attempt}/{self.max_retries}, delay {delay:.1f}s")
         await asyncio.sleep(delay)
 
@@ -1,9 +1,13 @@
 """后台任务调度器"""
 import asyncio
+import time
 from typing import Optional
 from datetime import datetime
 
 from ..http_client import get_httpx_verify_setting, create_async_client
+from ..logger import get_logger
+
+logger = get_logger("scheduler")
 
 
 class BackgroundScheduler:
@@ -20,7 +24,8 @@ class BackgroundScheduler:
         self._running = False
         self._refresh_interval = 300  # 5 分钟检查一次
         self._health_check_interval = 600  # 10 分钟健康检查
-        self._last_health_check = 0
+        self._last_health_check: Optional[float] = None  # time.monotonic()
+        self._refresh_before_expiry = 15 * 60  # 提前 15 分钟预刷新（秒）
     
     async def start(self):
         """启动后台任务"""
@@ -28,7 +33,7 @@ class BackgroundScheduler:
             return
         self._running = True
         self._task = asyncio.create_task(self._run())
-        print("[Scheduler] 后台任务已启动")
+        logger.info("后台任务已启动")
     
     async def stop(self):
         """停止后台任务"""
@@ -39,12 +44,11 @@ class BackgroundScheduler:
                 await self._task
             except asyncio.CancelledError:
                 pass
-        print("[Scheduler] 后台任务已停止")
+        logger.info("后台任务已停止")
     
     async def _run(self):
         """主循环"""
         from . import state
-        import time
         
         while self._running:
             try:
@@ -52,8 +56,8 @@ class BackgroundScheduler:
                 await self._refresh_expiring_tokens(state)
                 
                 # 健康检查
-                now = time.time()
-                if now - self._last_health_check > self._health_check_interval:
+                now = time.monotonic()
+                if self._last_health_check is None or now - self._last_health_check > self._health_check_interval:
                     await self._health_check(state)
                     self._last_health_check = now
                 
@@ -62,65 +66,58 @@ class BackgroundScheduler:
             except asyncio.CancelledError:
                 break
             except Exception as e:
-                print(f"[Scheduler] 错误: {e}")
+                logger.error(f"调度循环错误: {e}")
                 await asyncio.sleep(60)
     
     async def _refresh_expiring_tokens(self, state):
         """刷新即将过期的 Token"""
-        for acc in state.accounts:
-            if not acc.enabled:
-                continue
-            
-            # 提前 15 分钟刷新
-            if acc.is_token_expiring_soon(15):
-                print(f"[Scheduler] Token 即将过期，预刷新: {acc.name}")
-                success, msg = await acc.refresh_token()
-                if success:
-                    print(f"[Scheduler] Token 刷新成功: {acc.name}")
-                else:
-                    print(f"[Scheduler] Token 刷新失败: {acc.name} - {msg}")
+        for result in await state.refresh_expiring_tokens(self._refresh_before_expiry):
+            if result["success"]:
+                logger.info(f"Token 预刷新: {result['account_id']} - {result['message']}")
+            else:
+                logger.warning(f"Token 刷新失败: {result['account_id']} - {result['message']}")
     
     async def _health_check(self, state):
         """健康检查"""
-        import httpx
+        from .state import run_bounded
+        await run_bounded(self._check_one, [acc for acc in state.accounts if acc.enabled])
+    
+    async def _check_one(self, acc):
+        """检查单个账号的健康状态"""
         from ..config import MODELS_URL
         from ..credential import CredentialStatus
         
-        for acc in state.accounts:
-            if not acc.enabled:
-                continue
+        try:
+            token = acc.get_token()
+            if not token:
+                acc.status = CredentialStatus.UNHEALTHY
+                return
             
-            try:
-                token = acc.get_token()
-                if not token:
-                    acc.status = CredentialStatus.UNHEALTHY
-                    continue
-                
-                headers = {
-                    "Authorization": f"Bearer {token}",
-                    "content-type": "application/json"
-                }
+            headers = {
+                "Authorization": f"Bearer {token}",
+                "content-type": "application/json"
+            }
+            
+            async with create_async_client(timeout=10, account_proxy_url=acc.get_proxy_url()) as client:
+                resp = await client.get(
+                    MODELS_URL, 
+                    headers=headers,
+                    params={"origin": "AI_EDITOR"}
+                )
                 
-                async with create_async_client(timeout=10, account_proxy_url=acc.get_proxy_url()) as client:
-                    resp = await client.get(
-                        MODELS_URL, 
-                        headers=headers,
-                        params={"origin": "AI_EDITOR"}
-                    )
+                if resp.status_code == 200:
+                    if acc.status == CredentialStatus.UNHEALTHY:
+                        acc.status = CredentialStatus.ACTIVE
+                        logger.info(f"健康检查: 账号恢复健康: {acc.name}")
+                elif resp.status_code == 401:
+                    acc.status = CredentialStatus.UNHEALTHY
+                    logger.warning(f"健康检查: 账号认证失败: {acc.name}")
+                elif resp.status_code == 429:
+                    # 配额超限，不改变状态
+                    pass
                     
-                    if resp.status_code == 200:
-                        if acc.status == CredentialStatus.UNHEALTHY:
-                            acc.status = CredentialStatus.ACTIVE
-                            print(f"[HealthCheck] 账号恢复健康: {acc.name}")
-                    elif resp.status_code == 401:
-                        acc.status = CredentialStatus.UNHEALTHY
-                        print(f"[HealthCheck] 账号认证失败: {acc.name}")
-                    elif resp.status_code == 429:
-                        # 配额超限，不改变状态
-                        pass
-                        
-            except Exception as e:
-                print(f"[HealthCheck] 检查失败 {acc.name}: {e}")
+        except Exception as e:
+            logger.warning(f"健康检查失败 {acc.name}: {e}")
 
 
 # 全局调度器实例
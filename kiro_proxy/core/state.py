@@ -1,17 +1,59 @@
 """全局状态管理"""
+import asyncio
+import atexit
+import threading
 import time
 from collections import deque
+from operator import attrgetter
 from dataclasses import dataclass
 from typing import Optional, List, Dict
 from pathlib import Path
 
 from ..config import TOKEN_PATH
 from ..credential import quota_manager, CredentialStatus
+from ..logger import get_logger
 from .account import Account
 from .persistence import load_accounts, save_accounts
 
+logger = get_logger("state")
 
-@dataclass
+_by_request_count = attrgetter("request_count")
+
+# 账号配置写盘防抖间隔（秒）：连续修改合并为一次写入
+SAVE_DEBOUNCE_SECONDS = 0.5
+
+# 批量刷新时，将在该时间（秒）内过期的 token 视为需要刷新
+REFRESH_BEFORE_EXPIRY_SECONDS = 10 * 60
+
+# 批量刷新 token 时的最大并发账号数
+REFRESH_CONCURRENCY = 5
+
+# 批量刷新时单个账号的超时（秒），超时的账号记为失败，不拖住整批结果
+REFRESH_TIMEOUT_SECONDS = 60
+
+
+async def run_bounded(func, accounts: List[Account], timeout_result=None) -> list:
+    """对每个账号执行 func(acc)，最多 REFRESH_CONCURRENCY 个账号同时进行
+    
+    固定数量的 worker 依次从同一个迭代器取账号，不为每个账号预先创建协程；
+    单个账号超过 REFRESH_TIMEOUT_SECONDS 记为 timeout_result。结果按账号顺序返回。
+    """
+    results = [None] * len(accounts)
+    pending = iter(enumerate(accounts))
+    
+    async def worker():
+        for i, acc in pending:
+            try:
+                results[i] = await asyncio.wait_for(func(acc), REFRESH_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                logger.warning(f"账号处理超时，跳过: {acc.name}")
+                results[i] = timeout_result
+    
+    await asyncio.gather(*(worker() for _ in range(min(REFRESH_CONCURRENCY, len(accounts)))))
+    return results
+
+
+@dataclass(slots=True)
 class RequestLog:
     """请求日志"""
     id: str
@@ -25,13 +67,29 @@ class RequestLog:
     tokens_in: int = 0
     tokens_out: int = 0
     error: Optional[str] = None
+    
+    def to_dict(self) -> dict:
+        """转换为字典（字段平铺，直接构造，避免 asdict 的递归深拷贝）"""
+        return {
+            "id": self.id,
+            "timestamp": self.timestamp,
+            "method": self.method,
+            "path": self.path,
+            "model": self.model,
+            "account_id": self.account_id,
+            "status": self.status,
+            "duration_ms": self.duration_ms,
+            "tokens_in": self.tokens_in,
+            "tokens_out": self.tokens_out,
+            "error": self.error,
+        }
 
 
 class ProxyState:
     """全局状态管理"""
     
     def __init__(self):
-        self.accounts: List[Account] = []
+        self._accounts: List[Account] = []
         self.request_logs: deque = deque(maxlen=1000)
         self.total_requests: int = 0
         self.total_errors: int = 0
@@ -39,7 +97,24 @@ class ProxyState:
         self.session_timestamps: Dict[str, float] = {}
         self.start_time: float = time.time()
         self.current_port: int = 8080  # 当前运行端口
+        # id -> Account 索引，懒重建：未命中或 id 不一致时重建，替换/增删账号时清空
+        self._account_index: Dict[str, Account] = {}
+        # 待写入的账号配置（防抖）
+        self._pending_accounts: Optional[List[dict]] = None
+        self._save_timer: Optional[threading.Timer] = None
+        self._save_lock = threading.Lock()
+        self._write_lock = threading.Lock()
         self._load_accounts()
+        atexit.register(self.flush_accounts)
+    
+    @property
+    def accounts(self) -> List[Account]:
+        return self._accounts
+    
+    @accounts.setter
+    def accounts(self, value: List[Account]):
+        self._accounts = value
+        self._account_index = {}
     
     def _load_accounts(self):
         """从配置文件加载账号"""
@@ -55,7 +130,7 @@ class ProxyState:
                         enabled=acc_data.get("enabled", True),
                         proxy_url=acc_data.get("proxy_url"),
                     ))
-            print(f"[State] 从配置加载 {len(self.accounts)} 个账号")
+            logger.info(f"从配置加载 {len(self.accounts)} 个账号")
         
         # 如果没有账号，尝试添加默认账号
         if not self.accounts and TOKEN_PATH.exists():
@@ -67,7 +142,7 @@ class ProxyState:
             self._save_accounts()
     
     def _save_accounts(self):
-        """保存账号到配置文件"""
+        """保存账号到配置文件（防抖，稍后由后台线程写盘）"""
         accounts_data = [
             {
                 "id": acc.id,
@@ -78,28 +153,54 @@ class ProxyState:
             }
             for acc in self.accounts
         ]
-        save_accounts(accounts_data)
+        with self._save_lock:
+            self._pending_accounts = accounts_data
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+            self._save_timer = threading.Timer(SAVE_DEBOUNCE_SECONDS, self.flush_accounts)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+    
+    def flush_accounts(self) -> bool:
+        """立即写入待保存的账号配置
+        
+        _save_lock 只保护待写快照的交换，写盘在锁外进行，事件循环里的
+        _save_accounts() 不会被磁盘 IO 阻塞；_write_lock 保证多次写盘按取快照的顺序进行。
+        """
+        with self._write_lock:
+            with self._save_lock:
+                if self._save_timer is not None:
+                    self._save_timer.cancel()
+                    self._save_timer = None
+                pending, self._pending_accounts = self._pending_accounts, None
+            if pending is None:
+                return True
+            return save_accounts(pending)
+    
+    def get_account(self, account_id: str) -> Optional[Account]:
+        """按 id 查找账号（O(1) 哈希索引）"""
+        acc = self._account_index.get(account_id)
+        if acc is None or acc.id != account_id:
+            self._account_index = {a.id: a for a in self._accounts}
+            acc = self._account_index.get(account_id)
+        return acc
     
     def get_available_account(self, session_id: Optional[str] = None) -> Optional[Account]:
         """获取可用账号（支持会话粘性）"""
-        quota_manager.cleanup_expired()
-        
-        # 会话粘性
+        # 会话粘性：命中时只检查这一个账号，不做全量冷却清理和遍历
         if session_id and session_id in self.session_locks:
             account_id = self.session_locks[session_id]
-            ts = self.session_timestamps.get(session_id, 0)
-            if time.time() - ts < 60:
-                for acc in self.accounts:
-                    if acc.id == account_id and acc.is_available():
-                        self.session_timestamps[session_id] = time.time()
-                        return acc
+            now = time.time()
+            if now - self.session_timestamps.get(session_id, 0) < 60:
+                acc = self.get_account(account_id)
+                if acc is not None and acc.is_available():
+                    self.session_timestamps[session_id] = now
+                    return acc
         
-        available = [a for a in self.accounts if a.is_available()]
-        if not available:
+        account = self._select_least_used()
+        if account is None:
             return None
         
-        account = min(available, key=lambda a: a.request_count)
-        
         if session_id:
             self.session_locks[session_id] = account.id
             self.session_timestamps[session_id] = time.time()
@@ -108,44 +209,54 @@ class ProxyState:
     
     def get_next_available_account(self, exclude_id: str) -> Optional[Account]:
         """获取下一个可用账号（排除指定账号）"""
-        available = [a for a in self.accounts if a.is_available() and a.id != exclude_id]
-        if not available:
-            return None
-        return min(available, key=lambda a: a.request_count)
+        return self._select_least_used(exclude_id)
+    
+    def _select_least_used(self, exclude_id: Optional[str] = None) -> Optional[Account]:
+        """单次遍历选出请求数最少的可用账号，不构建中间列表"""
+        cooling_ids = quota_manager.get_cooling_ids()
+        return min(
+            (a for a in self.accounts if a.id != exclude_id and a.is_available(cooling_ids)),
+            key=_by_request_count,
+            default=None,
+        )
     
     def mark_rate_limited(self, account_id: str, duration_seconds: int = 60):
         """标记账号限流"""
-        for acc in self.accounts:
-            if acc.id == account_id:
-                acc.mark_quota_exceeded("Rate limited")
-                break
+        acc = self.get_account(account_id)
+        if acc is not None:
+            acc.mark_quota_exceeded("Rate limited")
     
     def mark_quota_exceeded(self, account_id: str, reason: str = "Quota exceeded"):
         """标记账号配额超限"""
-        for acc in self.accounts:
-            if acc.id == account_id:
-                acc.mark_quota_exceeded(reason)
-                break
+        acc = self.get_account(account_id)
+        if acc is not None:
+            acc.mark_quota_exceeded(reason)
     
     async def refresh_account_token(self, account_id: str) -> tuple:
         """刷新指定账号的 token"""
-        for acc in self.accounts:
-            if acc.id == account_id:
-                return await acc.refresh_token()
+        acc = self.get_account(account_id)
+        if acc is not None:
+            return await acc.refresh_token()
         return False, "账号不存在"
     
-    async def refresh_expiring_tokens(self) -> List[dict]:
-        """刷新所有即将过期的 token"""
-        results = []
-        for acc in self.accounts:
-            if acc.enabled and acc.is_token_expiring_soon(10):
-                success, msg = await acc.refresh_token()
-                results.append({
-                    "account_id": acc.id,
-                    "success": success,
-                    "message": msg
-                })
-        return results
+    async def refresh_expiring_tokens(self, before: int = REFRESH_BEFORE_EXPIRY_SECONDS) -> List[dict]:
+        """刷新 before 秒内过期的 token（最多 REFRESH_CONCURRENCY 个账号并发）"""
+        expiring = [
+            acc for acc in self.accounts
+            if acc.enabled and acc.is_token_expiring_within(before)
+        ]
+        
+        async def refresh_one(acc: Account) -> tuple:
+            # 排队等待期间可能已被其他请求刷新过，轮到该账号时再确认一次
+            if not acc.is_token_expiring_within(before):
+                return True, "Token 已被其他请求刷新"
+            return await acc.refresh_token()
+        
+        outcomes = await run_bounded(refresh_one, expiring, timeout_result=(False, "Token 刷新超时"))
+        return [
+            {"account_id": acc.id, "success": success, "message": msg}
+            for acc, (success, msg) in zip(expiring, outcomes)
+        ]
     
     def add_log(self, log: RequestLog):
         """添加请求日志"""
@@ -157,20 +268,31 @@ class ProxyState:
     def get_stats(self) -> dict:
         """获取统计信息"""
         uptime = time.time() - self.start_time
+        
+        # 单次遍历同时统计可用与冷却中的账号
+        cooling_ids = quota_manager.get_cooling_ids()
+        available = cooldown = 0
+        for acc in self.accounts:
+            if acc.is_available(cooling_ids):
+                available += 1
+            if acc.status == CredentialStatus.COOLDOWN:
+                cooldown += 1
+        
         return {
             "uptime_seconds": int(uptime),
             "total_requests": self.total_requests,
             "total_errors": self.total_errors,
             "error_rate": f"{(self.total_errors / max(1, self.total_requests) * 100):.1f}%",
             "accounts_total": len(self.accounts),
-            "accounts_available": len([a for a in self.accounts if a.is_available()]),
-            "accounts_cooldown": len([a for a in self.accounts if a.status == CredentialStatus.COOLDOWN]),
+            "accounts_available": available,
+            "accounts_cooldown": cooldown,
             "recent_logs": len(self.request_logs)
         }
     
     def get_accounts_status(self) -> List[dict]:
         """获取所有账号状态"""
-        return [acc.get_status_info() for acc in self.accounts]
+        cooling_ids = quota_manager.get_cooling_ids()
+        return [acc.get_status_info(cooling_ids) for acc in self.accounts]
 
 
 # 全局状态实例
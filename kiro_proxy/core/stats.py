@@ -1,11 +1,11 @@
 """请求统计增强"""
 from collections import defaultdict
 from dataclasses import dataclass, field
-from typing import Dict, List
+from typing import Dict, List, Optional
 import time
 
 
-@dataclass
+@dataclass(slots=True)
 class AccountStats:
     """账号统计"""
     total_requests: int = 0
@@ -29,7 +29,7 @@ class AccountStats:
         return self.total_errors / self.total_requests
 
 
-@dataclass
+@dataclass(slots=True)
 class ModelStats:
     """模型统计"""
     total_requests: int = 0
@@ -56,6 +56,8 @@ class StatsManager:
         self.by_account: Dict[str, AccountStats] = defaultdict(AccountStats)
         self.by_model: Dict[str, ModelStats] = defaultdict(ModelStats)
         self.hourly_requests: Dict[int, int] = defaultdict(int)  # hour -> count
+        # get_all_stats 结果缓存，只在 record_request 时失效（统计数据只在那里变化）
+        self._all_stats_cache: Optional[dict] = None
     
     def record_request(
         self,
@@ -67,6 +69,8 @@ class StatsManager:
         tokens_out: int = 0
     ):
         """记录请求"""
+        self._all_stats_cache = None
+        
         # 按账号统计
         self.by_account[account_id].record(success, tokens_in, tokens_out)
         
@@ -111,8 +115,11 @@ class StatsManager:
         }
     
     def get_all_stats(self) -> dict:
-        """获取所有统计"""
-        return {
+        """获取所有统计（无新请求时直接返回缓存，调用方不要修改返回值）"""
+        if self._all_stats_cache is not None:
+            return self._all_stats_cache
+        
+        self._all_stats_cache = {
             "by_account": {
                 acc_id: self.get_account_stats(acc_id)
                 for acc_id in self.by_account
@@ -124,6 +131,7 @@ class StatsManager:
             "hourly_requests": dict(self.hourly_requests),
             "requests_last_24h": sum(self.hourly_requests.values())
         }
+        return self._all_stats_cache
 
 
 # 全局统计实例
@@ -7,6 +7,7 @@ import httpx
 from dataclasses import dataclass
 from typing import Optional, Tuple
 
+from .. import json_codec
 from ..http_client import get_httpx_verify_setting, create_async_client
 
 
@@ -17,7 +18,7 @@ USAGE_LIMITS_URL = "https://q.us-east-1.amazonaws.com/getUsageLimits"
 LOW_BALANCE_THRESHOLD = 0.2
 
 
-@dataclass
+@dataclass(slots=True)
 class UsageInfo:
     """用量信息"""
     subscription_title: str = ""
@@ -155,7 +156,7 @@ async def get_usage_limits(
             if response.status_code != 200:
                 return False, {"error": f"API 请求失败: {response.status_code} - {response.text[:200]}"}
             
-            data = response.json()
+            data = json_codec.loads(response.content)
             usage_info = calculate_balance(data)
             return True, usage_info
             
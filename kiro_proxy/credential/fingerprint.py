@@ -2,10 +2,12 @@
 import hashlib
 import platform
 import subprocess
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
 
+@lru_cache(maxsize=1)
 def get_raw_machine_id() -> Optional[str]:
     """获取系统原始 Machine ID"""
     system = platform.system()
@@ -40,6 +42,7 @@ def get_raw_machine_id() -> Optional[str]:
     return None
 
 
+@lru_cache(maxsize=256)
 def generate_machine_id(
     profile_arn: Optional[str] = None,
     client_id: Optional[str] = None,
@@ -49,6 +52,7 @@ def generate_machine_id(
     
     每个凭证生成独立且稳定的 Machine ID，避免多账号共用同一指纹。
     优先级：uuid > profileArn > clientId > 系统硬件 ID
+    结果只取决于入参，按参数缓存，多个账号共用同一凭证时不重复计算。
     """
     if uuid:
         unique_key = uuid
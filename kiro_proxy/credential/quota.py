@@ -1,10 +1,11 @@
 """配额管理"""
+import re
 import time
 from dataclasses import dataclass
 from typing import Dict, Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class QuotaRecord:
     """配额超限记录"""
     credential_id: str
@@ -26,6 +27,8 @@ class QuotaManager:
         "rate limit", "quota", "too many requests", "throttl",
         "capacity", "overloaded", "try again later"
     ]
+    # 关键词预编译为一个忽略大小写的正则，一次扫描完成匹配，不必先 lower() 复制整段错误文本
+    _QUOTA_RE = re.compile("|".join(map(re.escape, QUOTA_KEYWORDS)), re.IGNORECASE)
     
     QUOTA_STATUS_CODES = {429, 503, 529}
     
@@ -38,8 +41,7 @@ class QuotaManager:
         if status_code and status_code in self.QUOTA_STATUS_CODES:
             return True
         
-        error_lower = error_message.lower()
-        return any(kw in error_lower for kw in self.QUOTA_KEYWORDS)
+        return self._QUOTA_RE.search(error_message) is not None
     
     def mark_exceeded(self, credential_id: str, reason: str, cooldown_seconds: int = None) -> QuotaRecord:
         """标记凭证为配额超限"""
@@ -83,6 +85,11 @@ class QuotaManager:
             del self.exceeded_records[k]
         return len(expired)
     
+    def get_cooling_ids(self) -> frozenset:
+        """获取仍在冷却中的凭证 id（批量选号用，只读一次时钟并顺带清理过期记录）"""
+        self.cleanup_expired()
+        return frozenset(self.exceeded_records)
+    
     def restore(self, credential_id: str) -> bool:
         """手动恢复凭证"""
         if credential_id in self.exceeded_records:
@@ -1,12 +1,13 @@
 """凭证数据类型"""
-import json
 import re
 import time
-from dataclasses import dataclass
-from datetime import datetime, timezone, timedelta
+from dataclasses import dataclass, field
+from datetime import datetime
 from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
+
+from .. import json_codec
 
 
 class CredentialStatus(Enum):
@@ -65,14 +66,14 @@ def _load_json_with_recovery(path: Path) -> Dict[str, Any]:
     raw = path.read_text(encoding="utf-8", errors="ignore")
 
     try:
-        data = json.loads(raw)
+        data = json_codec.loads(raw)
         return data if isinstance(data, dict) else {}
     except Exception:
         pass
 
     try:
         repaired = _repair_json(raw)
-        data = json.loads(repaired)
+        data = json_codec.loads(repaired)
         return data if isinstance(data, dict) else {}
     except Exception:
         pass
@@ -114,6 +115,8 @@ class KiroCredentials:
     uuid: Optional[str] = None
     start_url: Optional[str] = None
     last_refresh: Optional[str] = None
+    # 解析后的过期时间缓存: (expires_at 原始值, 时间戳, 是否 ISO 格式)，expires_at 变化时自动失效
+    _expiry_cache: tuple = field(default=(None, None, False), init=False, repr=False, compare=False)
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "KiroCredentials":
@@ -212,49 +215,68 @@ class KiroCredentials:
     
     def save_to_file(self, path: str):
         """保存凭证到文件"""
+        path_obj = Path(path)
         existing = {}
-        if Path(path).exists():
+        if path_obj.exists():
             try:
-                with open(path) as f:
-                    existing = json.load(f)
+                existing = json_codec.loads(path_obj.read_bytes())
             except Exception:
                 pass
         
         existing.update({k: v for k, v in self.to_dict().items() if v is not None})
         
-        with open(path, "w") as f:
-            json.dump(existing, f, indent=2)
+        path_obj.write_bytes(json_codec.dumps(existing, indent=True))
+    
+    def _parse_expiry(self) -> Tuple[Optional[float], bool]:
+        """解析 expires_at，返回 (时间戳, 是否 ISO 格式)，无法解析时时间戳为 None
+        
+        按原始字符串缓存，每次请求都要检查过期，避免重复解析 ISO 时间。
+        """
+        raw = self.expires_at
+        cached = self._expiry_cache
+        if cached[0] == raw:
+            return cached[1], cached[2]
+        
+        ts, is_iso = None, False
+        try:
+            if "T" in raw:
+                is_iso = True
+                expires = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+                # 不带时区的时间无法与 UTC 比较，视为无法解析
+                if expires.tzinfo is not None:
+                    ts = expires.timestamp()
+            else:
+                ts = int(raw)
+        except Exception:
+            ts = None
+        
+        self._expiry_cache = (raw, ts, is_iso)
+        return ts, is_iso
     
     def is_expired(self) -> bool:
         """检查 token 是否已过期"""
         if not self.expires_at:
             return True
         
-        try:
-            if "T" in self.expires_at:
-                expires = datetime.fromisoformat(self.expires_at.replace("Z", "+00:00"))
-                now = datetime.now(timezone.utc)
-                return expires <= now + timedelta(minutes=5)
-            
-            expires_ts = int(self.expires_at)
-            now_ts = int(time.time())
-            return now_ts >= (expires_ts - 300)
-        except Exception:
+        ts, is_iso = self._parse_expiry()
+        if ts is None:
             return True
+        if is_iso:
+            return ts <= time.time() + 300
+        return int(time.time()) >= (ts - 300)
     
     def is_expiring_soon(self, minutes: int = 10) -> bool:
         """检查 token 是否即将过期"""
+        return self.is_expiring_within(minutes * 60)
+    
+    def is_expiring_within(self, seconds: float) -> bool:
+        """检查 token 是否将在 seconds 秒内过期"""
         if not self.expires_at:
             return False
         
-        try:
-            if "T" in self.expires_at:
-                expires = datetime.fromisoformat(self.expires_at.replace("Z", "+00:00"))
-                now = datetime.now(timezone.utc)
-                return expires < now + timedelta(minutes=minutes)
-            
-            expires_ts = int(self.expires_at)
-            now_ts = int(time.time())
-            return now_ts >= (expires_ts - minutes * 60)
-        except Exception:
+        ts, is_iso = self._parse_expiry()
+        if ts is None:
             return False
+        if is_iso:
+            return ts < time.time() + seconds
+        return int(time.time()) >= (ts - seconds)
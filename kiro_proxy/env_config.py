@@ -59,6 +59,8 @@ TOKEN_REFRESH_THRESHOLD: int = int(os.getenv("KIRO_TOKEN_REFRESH_THRESHOLD", "60
 
 MAX_RETRIES: int = int(os.getenv("KIRO_MAX_RETRIES", "3"))
 BASE_RETRY_DELAY: float = float(os.getenv("KIRO_BASE_RETRY_DELAY", "1.0"))
+# Upper bound for a single backoff sleep (must be > 0)
+MAX_RETRY_DELAY: float = max(0.1, float(os.getenv("KIRO_MAX_RETRY_DELAY", "10.0")))
 
 # ==============================================================================
 # Payload Guard Settings
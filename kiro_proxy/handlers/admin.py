@@ -5,9 +5,10 @@ import time
 import httpx
 from pathlib import Path
 from datetime import datetime
-from dataclasses import asdict
 from fastapi import Request, HTTPException, Query
+from fastapi.responses import Response
 
+from .. import json_codec
 from ..config import TOKEN_PATH, MODELS_URL
 from ..core import state, Account, stats_manager, get_browsers_info, open_url, flow_monitor, get_account_usage
 from ..credential import quota_manager, generate_machine_id, get_kiro_version, CredentialStatus
@@ -49,51 +50,55 @@ async def get_logs(limit: int = Query(100, le=1000)):
     """获取请求日志"""
     logs = list(state.request_logs)[-limit:]
     return {
-        "logs": [asdict(log) for log in reversed(logs)],
+        "logs": [log.to_dict() for log in reversed(logs)],
         "total": len(state.request_logs)
     }
 
 
 async def get_accounts():
-    """获取账号列表（增强版）"""
-    return {
-        "accounts": state.get_accounts_status()
-    }
+    """获取账号列表（增强版）
+
+    状态字典只含基础类型，直接编码返回，跳过 FastAPI 的 jsonable_encoder 逐层遍历。
+    """
+    return Response(
+        content=json_codec.dumps({"accounts": state.get_accounts_status()}),
+        media_type="application/json",
+    )
 
 
 async def get_account_detail(account_id: str):
     """获取账号详细信息"""
-    for acc in state.accounts:
-        if acc.id == account_id:
-            creds = acc.get_credentials()
-            return {
-                "id": acc.id,
-                "name": acc.name,
-                "enabled": acc.enabled,
-                "status": acc.status.value,
-                "available": acc.is_available(),
-                "request_count": acc.request_count,
-                "error_count": acc.error_count,
-                "last_used": acc.last_used,
-                "token_path": acc.token_path,
-                "machine_id": acc.get_machine_id()[:16] + "...",
-                "credentials": {
-                    "has_access_token": bool(creds and creds.access_token),
-                    "has_refresh_token": bool(creds and creds.refresh_token),
-                    "has_client_id": bool(creds and creds.client_id),
-                    "auth_method": creds.auth_method if creds else None,
-                    "region": creds.region if creds else None,
-                    "expires_at": creds.expires_at if creds else None,
-                    "is_expired": acc.is_token_expired(),
-                    "is_expiring_soon": acc.is_token_expiring_soon(),
-                } if creds else None,
-                "cooldown": {
-                    "is_cooldown": not quota_manager.is_available(acc.id),
-                    "remaining_seconds": quota_manager.get_cooldown_remaining(acc.id),
-                },
-                "proxy_url": acc.proxy_url or None,
-            }
-    raise HTTPException(404, "Account not found")
+    acc = state.get_account(account_id)
+    if acc is None:
+        raise HTTPException(404, "Account not found")
+    creds = acc.get_credentials()
+    return {
+        "id": acc.id,
+        "name": acc.name,
+        "enabled": acc.enabled,
+        "status": acc.status.value,
+        "available": acc.is_available(),
+        "request_count": acc.request_count,
+        "error_count": acc.error_count,
+        "last_used": acc.last_used,
+        "token_path": acc.token_path,
+        "machine_id": acc.get_machine_id()[:16] + "...",
+        "credentials": {
+            "has_access_token": bool(creds and creds.access_token),
+            "has_refresh_token": bool(creds and creds.refresh_token),
+            "has_client_id": bool(creds and creds.client_id),
+            "auth_method": creds.auth_method if creds else None,
+            "region": creds.region if creds else None,
+            "expires_at": creds.expires_at if creds else None,
+            "is_expired": acc.is_token_expired(),
+            "is_expiring_soon": acc.is_token_expiring_soon(),
+        } if creds else None,
+        "cooldown": {
+            "is_cooldown": not quota_manager.is_available(acc.id),
+            "remaining_seconds": quota_manager.get_cooldown_remaining(acc.id),
+        },
+        "proxy_url": acc.proxy_url or None,
+    }
 
 
 async def add_account(request: Request):
@@ -135,25 +140,25 @@ async def delete_account(account_id: str):
 
 async def toggle_account(account_id: str):
     """启用/禁用账号"""
-    for acc in state.accounts:
-        if acc.id == account_id:
-            acc.enabled = not acc.enabled
-            # 保存配置
-            state._save_accounts()
-            return {"ok": True, "enabled": acc.enabled}
-    raise HTTPException(404, "Account not found")
+    acc = state.get_account(account_id)
+    if acc is None:
+        raise HTTPException(404, "Account not found")
+    acc.enabled = not acc.enabled
+    # 保存配置
+    state._save_accounts()
+    return {"ok": True, "enabled": acc.enabled}
 
 
 async def update_account_proxy(account_id: str, request: Request):
     """更新账号代理设置"""
     body = await request.json()
     proxy_url = body.get("proxy_url", "").strip() or None
-    for acc in state.accounts:
-        if acc.id == account_id:
-            acc.proxy_url = proxy_url
-            state._save_accounts()
-            return {"ok": True, "proxy_url": acc.proxy_url}
-    raise HTTPException(404, "Account not found")
+    acc = state.get_account(account_id)
+    if acc is None:
+        raise HTTPException(404, "Account not found")
+    acc.proxy_url = proxy_url
+    state._save_accounts()
+    return {"ok": True, "proxy_url": acc.proxy_url}
 
 
 async def refresh_account_token(account_id: str):
@@ -176,11 +181,10 @@ async def restore_account(account_id: str):
     """恢复账号（从冷却状态）"""
     restored = quota_manager.restore(account_id)
     if restored:
-        for acc in state.accounts:
-            if acc.id == account_id:
-                from ..credential import CredentialStatus
-                acc.status = CredentialStatus.ACTIVE
-                break
+        acc = state.get_account(account_id)
+        if acc is not None:
+            from ..credential import CredentialStatus
+            acc.status = CredentialStatus.ACTIVE
     return {"ok": restored}
 
 
@@ -219,13 +223,14 @@ async def scan_tokens():
     found = []
     sso_cache = Path.home() / ".aws/sso/cache"
     if sso_cache.exists():
+        added_paths = {a.token_path for a in state.accounts}
         for f in sso_cache.glob("*.json"):
             try:
                 with open(f) as fp:
                     data = json.load(fp)
                     if "accessToken" in data:
                         # 检查是否已添加
-                        already_added = any(a.token_path == str(f) for a in state.accounts)
+                        already_added = str(f) in added_paths
                         
                         auth_method = data.get("authMethod", "social")
                         client_id_hash = data.get("clientIdHash")
@@ -311,20 +316,22 @@ async def import_config(request: Request):
     body = await request.json()
     accounts = body.get("accounts", [])
     imported = 0
+    # 已存在的 token 路径集合，导入列表内的重复项也随之去重
+    known_paths = {a.token_path for a in state.accounts}
     
     for acc_data in accounts:
         token_path = acc_data.get("token_path", "")
-        if Path(token_path).exists():
-            if not any(a.token_path == token_path for a in state.accounts):
-                account = Account(
-                    id=uuid.uuid4().hex[:8],
-                    name=acc_data.get("name", "导入账号"),
-                    token_path=token_path,
-                    enabled=acc_data.get("enabled", True)
-                )
-                state.accounts.append(account)
-                account.load_credentials()
-                imported += 1
+        if token_path not in known_paths and Path(token_path).exists():
+            known_paths.add(token_path)
+            account = Account(
+                id=uuid.uuid4().hex[:8],
+                name=acc_data.get("name", "导入账号"),
+                token_path=token_path,
+                enabled=acc_data.get("enabled", True)
+            )
+            state.accounts.append(account)
+            account.load_credentials()
+            imported += 1
     
     # 保存配置
     state._save_accounts()
@@ -558,7 +565,8 @@ async def poll_kiro_login():
         return {
             "ok": True,
             "completed": False,
-            "status": result.get("status", "pending")
+            "status": result.get("status", "pending"),
+            "interval": result.get("interval"),
         }
 
 
@@ -762,29 +770,29 @@ async def export_flows(request: Request):
 
 async def get_account_usage_info(account_id: str):
     """获取账号用量信息"""
-    for acc in state.accounts:
-        if acc.id == account_id:
-            success, result = await get_account_usage(acc)
-            if success:
-                return {
-                    "ok": True,
-                    "account_id": account_id,
-                    "account_name": acc.name,
-                    "usage": {
-                        "subscription_title": result.subscription_title,
-                        "usage_limit": result.usage_limit,
-                        "current_usage": result.current_usage,
-                        "balance": result.balance,
-                        "is_low_balance": result.is_low_balance,
-                        "free_trial_limit": result.free_trial_limit,
-                        "free_trial_usage": result.free_trial_usage,
-                        "bonus_limit": result.bonus_limit,
-                        "bonus_usage": result.bonus_usage,
-                    }
-                }
-            else:
-                return {"ok": False, "error": result.get("error", "查询失败")}
-    raise HTTPException(404, "Account not found")
+    acc = state.get_account(account_id)
+    if acc is None:
+        raise HTTPException(404, "Account not found")
+    success, result = await get_account_usage(acc)
+    if success:
+        return {
+            "ok": True,
+            "account_id": account_id,
+            "account_name": acc.name,
+            "usage": {
+                "subscription_title": result.subscription_title,
+                "usage_limit": result.usage_limit,
+                "current_usage": result.current_usage,
+                "balance": result.balance,
+                "is_low_balance": result.is_low_balance,
+                "free_trial_limit": result.free_trial_limit,
+                "free_trial_usage": result.free_trial_usage,
+                "bonus_limit": result.bonus_limit,
+                "bonus_usage": result.bonus_usage,
+            }
+        }
+    else:
+        return {"ok": False, "error": result.get("error", "查询失败")}
 
 
 # ==================== 账号导入导出 API ====================
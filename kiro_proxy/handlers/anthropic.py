@@ -156,10 +156,10 @@ async def handle_messages(request: Request):
     
     # 检查 token 是否即将过期，尝试刷新
     if account.is_token_expiring_soon(5):
-        print(f"[Anthropic] Token 即将过期，尝试刷新: {account.id}")
+        logger.info(f"Token 即将过期，尝试刷新: {account.id}")
         success, msg = await account.refresh_token()
         if not success:
-            print(f"[Anthropic] Token 刷新失败: {msg}")
+            logger.warning(f"Token 刷新失败: {msg}")
     
     token = account.get_token()
     if not token:
@@ -256,7 +256,7 @@ async def _handle_stream(kiro_request, headers, account, model, log_id, start_ti
                             # 尝试切换账号
                             next_account = state.get_next_available_account(current_account.id)
                             if next_account and retry_count < max_retries:
-                                print(f"[Stream] 配额超限，切换账号: {current_account.id} -> {next_account.id}")
+                                logger.warning(f"配额超限，切换账号: {current_account.id} -> {next_account.id}")
                                 current_account = next_account
                                 token = current_account.get_token()
                                 headers["Authorization"] = f"Bearer {token}"
@@ -271,7 +271,7 @@ async def _handle_stream(kiro_request, headers, account, model, log_id, start_ti
                         # 处理可重试的服务端错误
                         if is_retryable_error(response.status_code):
                             if retry_count < max_retries:
-                                print(f"[Stream] 服务端错误 {response.status_code}，重试 {retry_count + 1}/{max_retries}")
+                                logger.warning(f"服务端错误 {response.status_code}，重试 {retry_count + 1}/{max_retries}")
                                 retry_count += 1
                                 import asyncio
                                 await asyncio.sleep(0.5 * (2 ** retry_count))
@@ -321,7 +321,7 @@ async def _handle_stream(kiro_request, headers, account, model, log_id, start_ti
                             if error_obj.should_switch_account:
                                 next_account = state.get_next_available_account(current_account.id)
                                 if next_account and retry_count < max_retries:
-                                    print(f"[Stream] 切换账号: {current_account.id} -> {next_account.id}")
+                                    logger.info(f"切换账号: {current_account.id} -> {next_account.id}")
                                     current_account = next_account
                                     headers["Authorization"] = f"Bearer {current_account.get_token()}"
                                     retry_count += 1
@@ -431,7 +431,7 @@ async def _handle_stream(kiro_request, headers, account, model, log_id, start_ti
 
             except httpx.TimeoutException:
                 if retry_count < max_retries:
-                    print(f"[Stream] 请求超时，重试 {retry_count + 1}/{max_retries}")
+                    logger.warning(f"请求超时，重试 {retry_count + 1}/{max_retries}")
                     retry_count += 1
                     import asyncio
                     await asyncio.sleep(0.5 * (2 ** retry_count))
@@ -442,7 +442,7 @@ async def _handle_stream(kiro_request, headers, account, model, log_id, start_ti
                 return
             except httpx.ConnectError:
                 if retry_count < max_retries:
-                    print(f"[Stream] 连接错误，重试 {retry_count + 1}/{max_retries}")
+                    logger.warning(f"连接错误，重试 {retry_count + 1}/{max_retries}")
                     retry_count += 1
                     import asyncio
                     await asyncio.sleep(0.5 * (2 ** retry_count))
@@ -454,7 +454,7 @@ async def _handle_stream(kiro_request, headers, account, model, log_id, start_ti
             except Exception as e:
                 # 检查是否为可重试的网络错误
                 if is_retryable_error(None, e) and retry_count < max_retries:
-                    print(f"[Stream] 网络错误，重试 {retry_count + 1}/{max_retries}: {type(e).__name__}")
+                    logger.warning(f"网络错误，重试 {retry_count + 1}/{max_retries}: {type(e).__name__}")
                     retry_count += 1
                     import asyncio
                     await asyncio.sleep(0.5 * (2 ** retry_count))
@@ -488,7 +488,7 @@ async def _handle_non_stream(kiro_request, headers, account, model, log_id, star
                     # 尝试切换账号
                     next_account = state.get_next_available_account(current_account.id)
                     if next_account and retry < max_retries:
-                        print(f"[NonStream] 配额超限，切换账号: {current_account.id} -> {next_account.id}")
+                        logger.warning(f"配额超限，切换账号: {current_account.id} -> {next_account.id}")
                         current_account = next_account
                         token = current_account.get_token()
                         creds = current_account.get_credentials()
@@ -502,7 +502,7 @@ async def _handle_non_stream(kiro_request, headers, account, model, log_id, star
                 # 处理可重试的服务端错误
                 if is_retryable_error(response.status_code):
                     if retry < max_retries:
-                        print(f"[NonStream] 服务端错误 {response.status_code}，重试 {retry + 1}/{max_retries}")
+                        logger.warning(f"服务端错误 {response.status_code}，重试 {retry + 1}/{max_retries}")
                         await retry_ctx.wait()
                         continue
                     if flow_id:
@@ -522,7 +522,7 @@ async def _handle_non_stream(kiro_request, headers, account, model, log_id, star
                     if error_obj.should_switch_account:
                         next_account = state.get_next_available_account(current_account.id)
                         if next_account and retry < max_retries:
-                            print(f"[NonStream] 切换账号: {current_account.id} -> {next_account.id}")
+                            logger.info(f"切换账号: {current_account.id} -> {next_account.id}")
                             current_account = next_account
                             headers["Authorization"] = f"Bearer {current_account.get_token()}"
                             continue
@@ -577,7 +577,7 @@ async def _handle_non_stream(kiro_request, headers, account, model, log_id, star
             error_msg = f"Request timeout: {e}"
             status_code = 408
             if retry < max_retries:
-                print(f"[NonStream] 请求超时，重试 {retry + 1}/{max_retries}")
+                logger.warning(f"请求超时，重试 {retry + 1}/{max_retries}")
                 await retry_ctx.wait()
                 continue
             if flow_id:
@@ -587,7 +587,7 @@ async def _handle_non_stream(kiro_request, headers, account, model, log_id, star
             error_msg = f"Connection error: {e}"
             status_code = 502
             if retry < max_retries:
-                print(f"[NonStream] 连接错误，重试 {retry + 1}/{max_retries}")
+                logger.warning(f"连接错误，重试 {retry + 1}/{max_retries}")
                 await retry_ctx.wait()
                 continue
             if flow_id:
@@ -598,7 +598,7 @@ async def _handle_non_stream(kiro_request, headers, account, model, log_id, star
             status_code = 500
             # 检查是否为可重试的网络错误
             if is_retryable_error(None, e) and retry < max_retries:
-                print(f"[NonStream] 网络错误，重试 {retry + 1}/{max_retries}: {type(e).__name__}")
+                logger.warning(f"网络错误，重试 {retry + 1}/{max_retries}: {type(e).__name__}")
                 await retry_ctx.wait()
                 continue
             if flow_id:
@@ -47,10 +47,10 @@ async def handle_generate_content(model_name: str, request: Request):
     
     # 检查 token 是否即将过期
     if account.is_token_expiring_soon(5):
-        print(f"[Gemini] Token 即将过期，尝试刷新: {account.id}")
+        logger.info(f"Token 即将过期，尝试刷新: {account.id}")
         success, msg = await account.refresh_token()
         if not success:
-            print(f"[Gemini] Token 刷新失败: {msg}")
+            logger.warning(f"Token 刷新失败: {msg}")
     
     token = account.get_token()
     if not token:
@@ -146,7 +146,7 @@ async def handle_generate_content(model_name: str, request: Request):
                     current_account.mark_quota_exceeded("Rate limited")
                     next_account = state.get_next_available_account(current_account.id)
                     if next_account and retry < max_retries:
-                        print(f"[Gemini] 配额超限，切换账号: {current_account.id} -> {next_account.id}")
+                        logger.warning(f"配额超限，切换账号: {current_account.id} -> {next_account.id}")
                         current_account = next_account
                         token = current_account.get_token()
                         creds = current_account.get_credentials()
@@ -163,7 +163,7 @@ async def handle_generate_content(model_name: str, request: Request):
                 # 处理可重试的服务端错误
                 if is_retryable_error(resp.status_code):
                     if retry < max_retries:
-                        print(f"[Gemini] 服务端错误 {resp.status_code}，重试 {retry + 1}/{max_retries}")
+                        logger.warning(f"服务端错误 {resp.status_code}，重试 {retry + 1}/{max_retries}")
                         import asyncio
                         await asyncio.sleep(0.5 * (2 ** retry))
                         continue
@@ -191,7 +191,7 @@ async def handle_generate_content(model_name: str, request: Request):
                     if error.should_switch_account:
                         next_account = state.get_next_available_account(current_account.id)
                         if next_account and retry < max_retries:
-                            print(f"[Gemini] 切换账号: {current_account.id} -> {next_account.id}")
+                            logger.info(f"切换账号: {current_account.id} -> {next_account.id}")
                             current_account = next_account
                             headers["Authorization"] = f"Bearer {current_account.get_token()}"
                             continue
@@ -234,7 +234,7 @@ async def handle_generate_content(model_name: str, request: Request):
             error_msg = "Request timeout"
             status_code = 408
             if retry < max_retries:
-                print(f"[Gemini] 请求超时，重试 {retry + 1}/{max_retries}")
+                logger.warning(f"请求超时，重试 {retry + 1}/{max_retries}")
                 import asyncio
                 await asyncio.sleep(0.5 * (2 ** retry))
                 continue
@@ -243,7 +243,7 @@ async def handle_generate_content(model_name: str, request: Request):
             error_msg = "Connection error"
             status_code = 502
             if retry < max_retries:
-                print(f"[Gemini] 连接错误，重试 {retry + 1}/{max_retries}")
+                logger.warning(f"连接错误，重试 {retry + 1}/{max_retries}")
                 import asyncio
                 await asyncio.sleep(0.5 * (2 ** retry))
                 continue
@@ -252,7 +252,7 @@ async def handle_generate_content(model_name: str, request: Request):
             error_msg = str(e)
             status_code = 500
             if is_retryable_error(None, e) and retry < max_retries:
-                print(f"[Gemini] 网络错误，重试 {retry + 1}/{max_retries}: {type(e).__name__}")
+                logger.warning(f"网络错误，重试 {retry + 1}/{max_retries}: {type(e).__name__}")
                 import asyncio
                 await asyncio.sleep(0.5 * (2 ** retry))
                 continue
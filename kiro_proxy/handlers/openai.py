@@ -63,10 +63,10 @@ async def handle_chat_completions(request: Request):
     
     # 检查 token 是否即将过期，尝试刷新
     if account.is_token_expiring_soon(5):
-        print(f"[OpenAI] Token 即将过期，尝试刷新: {account.id}")
+        logger.info(f"Token 即将过期，尝试刷新: {account.id}")
         success, msg = await account.refresh_token()
         if not success:
-            print(f"[OpenAI] Token 刷新失败: {msg}")
+            logger.warning(f"Token 刷新失败: {msg}")
     
     token = account.get_token()
     if not token:
@@ -172,7 +172,7 @@ async def handle_chat_completions(request: Request):
                     # 尝试切换账号
                     next_account = state.get_next_available_account(current_account.id)
                     if next_account and retry < max_retries:
-                        print(f"[OpenAI] 配额超限，切换账号: {current_account.id} -> {next_account.id}")
+                        logger.warning(f"配额超限，切换账号: {current_account.id} -> {next_account.id}")
                         current_account = next_account
                         token = current_account.get_token()
                         creds = current_account.get_credentials()
@@ -190,7 +190,7 @@ async def handle_chat_completions(request: Request):
                 # 处理可重试的服务端错误
                 if is_retryable_error(resp.status_code):
                     if retry < max_retries:
-                        print(f"[OpenAI] 服务端错误 {resp.status_code}，重试 {retry + 1}/{max_retries}")
+                        logger.warning(f"服务端错误 {resp.status_code}，重试 {retry + 1}/{max_retries}")
                         await asyncio.sleep(0.5 * (2 ** retry))
                         continue
                     raise HTTPException(resp.status_code, f"Server error after {max_retries} retries")
@@ -218,7 +218,7 @@ async def handle_chat_completions(request: Request):
                     if error.should_switch_account:
                         next_account = state.get_next_available_account(current_account.id)
                         if next_account and retry < max_retries:
-                            print(f"[OpenAI] 切换账号: {current_account.id} -> {next_account.id}")
+                            logger.info(f"切换账号: {current_account.id} -> {next_account.id}")
                             current_account = next_account
                             headers["Authorization"] = f"Bearer {current_account.get_token()}"
                             continue
@@ -261,7 +261,7 @@ async def handle_chat_completions(request: Request):
             error_msg = "Request timeout"
             status_code = 408
             if retry < max_retries:
-                print(f"[OpenAI] 请求超时，重试 {retry + 1}/{max_retries}")
+                logger.warning(f"请求超时，重试 {retry + 1}/{max_retries}")
                 await asyncio.sleep(0.5 * (2 ** retry))
                 continue
             raise HTTPException(408, "Request timeout after retries")
@@ -269,7 +269,7 @@ async def handle_chat_completions(request: Request):
             error_msg = "Connection error"
             status_code = 502
             if retry < max_retries:
-                print(f"[OpenAI] 连接错误，重试 {retry + 1}/{max_retries}")
+                logger.warning(f"连接错误，重试 {retry + 1}/{max_retries}")
                 await asyncio.sleep(0.5 * (2 ** retry))
                 continue
             raise HTTPException(502, "Connection error after retries")
@@ -278,7 +278,7 @@ async def handle_chat_completions(request: Request):
             status_code = 500
             # 检查是否为可重试的网络错误
             if is_retryable_error(None, e) and retry < max_retries:
-                print(f"[OpenAI] 网络错误，重试 {retry + 1}/{max_retries}: {type(e).__name__}")
+                logger.warning(f"网络错误，重试 {retry + 1}/{max_retries}: {type(e).__name__}")
                 await asyncio.sleep(0.5 * (2 ** retry))
                 continue
             raise HTTPException(500, str(e))
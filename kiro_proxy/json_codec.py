@@ -0,0 +1,37 @@
+"""JSON 编解码
+
+优先使用 orjson（直接处理 bytes，比标准库快数倍），未安装时回退到标准库 json。
+"""
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(data: Any) -> Any:
+    """解析 JSON（接受 bytes / str）"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _std_dumps(obj: Any, indent: bool) -> bytes:
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """序列化为 UTF-8 bytes，indent=True 时使用 2 空格缩进
+
+    orjson 不支持的内容（如超出 64 位的整数、非字符串键）回退到标准库 json。
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else None)
+        except orjson.JSONEncodeError:
+            pass
+    return _std_dumps(obj, indent)
@@ -13,6 +13,7 @@ from .config import MODELS_URL
 from .core import state, scheduler, stats_manager
 from .handlers import anthropic, openai, gemini, admin
 from .handlers import responses as responses_handler
+from .auth import close_http_client as close_auth_http_client
 from .http_client import get_httpx_verify_setting, create_async_client
 from .web import get_html_page
 from .credential import generate_machine_id, get_kiro_version
@@ -36,6 +37,7 @@ async def lifespan(app: FastAPI):
     yield
     # 关闭时
     await scheduler.stop()
+    await close_auth_http_client()
 
 
 app = FastAPI(title="Kiro API Proxy", docs_url="/docs", redoc_url=None, lifespan=lifespan)
@@ -9,10 +9,10 @@ The Kiro API rejects payloads exceeding ~615KB with a misleading
 Inspired by kiro-gateway's payload_guards.py.
 """
 
-import json
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional
 
+from . import json_codec
 from .logger import get_logger
 from .env_config import KIRO_MAX_PAYLOAD_BYTES, AUTO_TRIM_PAYLOAD
 
@@ -30,8 +30,14 @@ class PayloadTrimStats:
 
 
 def check_payload_size(payload: Dict[str, Any]) -> int:
-    """Return the serialized byte size of the payload as UTF-8 JSON."""
-    return len(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+    """Return the serialized byte size of the payload as UTF-8 JSON.
+
+    Encodes compact UTF-8 bytes directly (orjson when available), which is
+    also how httpx (>= 0.28) serializes the ``json=`` request body on the
+    wire. Values orjson cannot encode, such as integers beyond 64 bits,
+    fall back to the standard library inside ``json_codec.dumps``.
+    """
+    return len(json_codec.dumps(payload))
 
 
 def _strip_empty_tool_uses(history: List[Dict]) -> None:
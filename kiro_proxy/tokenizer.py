@@ -11,6 +11,8 @@ Inspired by kiro-gateway's tokenizer.py.
 """
 
 import json
+import threading
+import time
 from typing import Any, Dict, List, Optional
 
 from .logger import get_logger
@@ -19,6 +21,12 @@ logger = get_logger("tokenizer")
 
 # Lazy loading of tiktoken
 _encoding = None
+_encoding_initialized = False
+_encoding_retry_at = 0.0
+_encoding_lock = threading.Lock()
+
+# Seconds to wait before retrying after a transient tiktoken load failure
+ENCODING_RETRY_SECONDS = 60
 
 # Claude tokenizes ~15% more than GPT-4 (cl100k_base)
 CLAUDE_CORRECTION_FACTOR = 1.15
@@ -29,18 +37,32 @@ def _get_encoding():
 
     Uses cl100k_base encoding for GPT-4/ChatGPT,
     which is close enough to Claude tokenization.
+
+    A missing tiktoken is detected once and not retried. Other load
+    failures (e.g. a network error while fetching the BPE file) fall back
+    to estimation and are retried after ENCODING_RETRY_SECONDS. The
+    double-checked lock keeps concurrent callers from loading it twice.
     """
-    global _encoding
-    if _encoding is None:
+    global _encoding, _encoding_initialized, _encoding_retry_at
+    if _encoding_initialized or time.monotonic() < _encoding_retry_at:
+        return _encoding
+    with _encoding_lock:
+        if _encoding_initialized or time.monotonic() < _encoding_retry_at:
+            return _encoding
         try:
             import tiktoken
             _encoding = tiktoken.get_encoding("cl100k_base")
+            _encoding_initialized = True
         except ImportError:
             logger.warning(
                 "tiktoken not installed; falling back to character-based estimation"
             )
+            _encoding_initialized = True
         except Exception as e:
-            logger.warning(f"Failed to initialize tiktoken: {e}")
+            logger.warning(
+                f"Failed to initialize tiktoken: {e}; retrying in {ENCODING_RETRY_SECONDS}s"
+            )
+            _encoding_retry_at = time.monotonic() + ENCODING_RETRY_SECONDS
     return _encoding
 
 
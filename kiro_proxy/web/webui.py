@@ -1132,6 +1132,7 @@ function importAccounts(){
 JS_LOGIN = '''
 // Kiro 在线登录
 let loginPollTimer=null;
+let loginPollInterval=5;
 let selectedBrowser='default';
 
 async function showLoginOptions(){
@@ -1228,7 +1229,7 @@ async function startKiroLogin(browser='default'){
     const d=await r.json();
     if(!d.ok){alert('启动登录失败: '+d.error);return;}
     showLoginPanel(d);
-    startLoginPoll();
+    startLoginPoll(d.interval);
   }catch(e){alert('启动登录失败: '+e.message)}
 }
 
@@ -1248,9 +1249,14 @@ function showLoginPanel(data){
   `;
 }
 
-function startLoginPoll(){
-  if(loginPollTimer)clearInterval(loginPollTimer);
-  loginPollTimer=setInterval(pollLogin,3000);
+function startLoginPoll(interval){
+  stopLoginPoll();
+  scheduleLoginPoll(interval);
+}
+
+function scheduleLoginPoll(interval){
+  if(interval)loginPollInterval=interval;
+  loginPollTimer=setTimeout(pollLogin,Math.max(loginPollInterval,1)*1000);
 }
 
 async function pollLogin(){
@@ -1263,12 +1269,14 @@ async function pollLogin(){
       $('#loginStatus').style.color='var(--success)';
       stopLoginPoll();
       setTimeout(()=>{$('#loginPanel').style.display='none';loadAccounts();},1500);
+      return;
     }
-  }catch(e){$('#loginStatus').textContent='轮询失败: '+e.message}
+    scheduleLoginPoll(d.interval);
+  }catch(e){$('#loginStatus').textContent='轮询失败: '+e.message;scheduleLoginPoll()}
 }
 
 function stopLoginPoll(){
-  if(loginPollTimer){clearInterval(loginPollTimer);loginPollTimer=null;}
+  if(loginPollTimer){clearTimeout(loginPollTimer);loginPollTimer=null;}
 }
 
 async function cancelKiroLogin(){
@@ -0,0 +1,91 @@
+import asyncio
+import sys
+import unittest
+from unittest import mock
+
+from kiro_proxy.core.account import Account
+
+account_module = sys.modules["kiro_proxy.core.account"]
+
+
+class _FakeRefresher:
+    calls = 0
+    release: asyncio.Event = None
+    result = (True, "new-token")
+    error: Exception = None
+
+    def __init__(self, creds, proxy_url=None):
+        pass
+
+    async def refresh(self):
+        type(self).calls += 1
+        await type(self).release.wait()
+        if type(self).error is not None:
+            raise type(self).error
+        return type(self).result
+
+
+class RefreshTokenSingleFlightTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        _FakeRefresher.calls = 0
+        _FakeRefresher.release = asyncio.Event()
+        _FakeRefresher.result = (True, "new-token")
+        _FakeRefresher.error = None
+        patcher = mock.patch.object(account_module, "TokenRefresher", _FakeRefresher)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.creds = mock.Mock()
+        patcher = mock.patch.object(Account, "get_credentials", return_value=self.creds)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.account = Account(id="a1", name="test", token_path="/tmp/a1-token.json")
+
+    async def test_concurrent_callers_share_one_refresh(self):
+        callers = [asyncio.create_task(self.account.refresh_token()) for _ in range(5)]
+        await asyncio.sleep(0)
+        _FakeRefresher.release.set()
+        results = await asyncio.gather(*callers)
+
+        self.assertEqual(_FakeRefresher.calls, 1)
+        self.assertEqual(results, [(True, "Token 刷新成功")] * 5)
+        self.creds.save_to_file.assert_called_once_with("/tmp/a1-token.json")
+
+    async def test_cancelling_one_caller_keeps_others_waiting(self):
+        first = asyncio.create_task(self.account.refresh_token())
+        second = asyncio.create_task(self.account.refresh_token())
+        await asyncio.sleep(0)
+
+        first.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await first
+
+        _FakeRefresher.release.set()
+        self.assertEqual(await second, (True, "Token 刷新成功"))
+        self.assertEqual(_FakeRefresher.calls, 1)
+
+    async def test_slot_cleared_after_success(self):
+        _FakeRefresher.release.set()
+        await self.account.refresh_token()
+        await asyncio.sleep(0)
+        self.assertIsNone(self.account._refresh_task)
+
+        await self.account.refresh_token()
+        self.assertEqual(_FakeRefresher.calls, 2)
+
+    async def test_slot_cleared_after_exception(self):
+        _FakeRefresher.error = RuntimeError("boom")
+        _FakeRefresher.release.set()
+        with self.assertRaises(RuntimeError):
+            await self.account.refresh_token()
+        await asyncio.sleep(0)
+        self.assertIsNone(self.account._refresh_task)
+
+        _FakeRefresher.error = None
+        self.assertEqual(await self.account.refresh_token(), (True, "Token 刷新成功"))
+        self.assertEqual(_FakeRefresher.calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import asyncio
+import sys
+import unittest
+from unittest import mock
+
+import kiro_proxy.auth  # noqa: F401
+from kiro_proxy.auth.device_flow import start_callback_server, wait_for_callback
+
+device_flow = sys.modules["kiro_proxy.auth.device_flow"]
+CALLBACK_PATH = device_flow.SOCIAL_CALLBACK_PATH
+
+
+class CallbackServerTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        # 端口 0：由系统分配空闲端口，避免与本机已占用的回调端口冲突
+        patcher = mock.patch.object(device_flow, "SOCIAL_CALLBACK_PORT", 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        ok, _ = await start_callback_server()
+        self.assertTrue(ok)
+        self.port = device_flow._mgr.callback_server.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        await device_flow._close_callback_server()
+        device_flow._mgr.callback_future = None
+
+    async def _get(self, target: str) -> bytes:
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        writer.write(
+            f"GET {target} HTTP/1.1\r\nHost: 127.0.0.1\r\nUser-Agent: test\r\n\r\n".encode("ascii")
+        )
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        await writer.wait_closed()
+        return response
+
+    async def test_unknown_path_returns_404_and_keeps_waiting(self):
+        response = await self._get("/favicon.ico")
+
+        self.assertTrue(response.startswith(b"HTTP/1.1 404 Not Found\r\n"))
+        self.assertFalse(device_flow._mgr.callback_future.done())
+
+    async def test_delivers_code_and_state(self):
+        response = await self._get(f"{CALLBACK_PATH}?code=abc%2F1&state=xyz")
+
+        self.assertTrue(response.startswith(b"HTTP/1.1 200 OK\r\n"))
+        ok, result = await wait_for_callback(timeout=1)
+        self.assertTrue(ok)
+        self.assertEqual(result, {"code": "abc/1", "state": "xyz"})
+        self.assertIsNone(device_flow._mgr.callback_server)
+
+    async def test_missing_code_reports_error(self):
+        await self._get(f"{CALLBACK_PATH}?state=xyz")
+
+        ok, result = await wait_for_callback(timeout=1)
+        self.assertFalse(ok)
+        self.assertEqual(result, {"error": "缺少授权码"})
+
+    async def test_error_query_is_delivered(self):
+        await self._get(f"{CALLBACK_PATH}?error=access_denied&state=xyz")
+
+        ok, result = await wait_for_callback(timeout=1)
+        self.assertFalse(ok)
+        self.assertEqual(result, {"error": "access_denied"})
+
+    async def test_first_result_wins(self):
+        await self._get(f"{CALLBACK_PATH}?code=first&state=s")
+        await self._get(f"{CALLBACK_PATH}?code=second&state=s")
+
+        _, result = await wait_for_callback(timeout=1)
+        self.assertEqual(result["code"], "first")
+
+
+if __name__ == "__main__":
+    unittest.main()
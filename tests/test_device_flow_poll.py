@@ -0,0 +1,142 @@
+import asyncio
+import sys
+import time
+import unittest
+from unittest import mock
+
+import httpx
+
+import kiro_proxy.auth  # noqa: F401
+from kiro_proxy.auth.device_flow import DeviceFlowState, poll_device_flow
+
+device_flow = sys.modules["kiro_proxy.auth.device_flow"]
+
+
+class _StubClient:
+    """替代共享 AsyncClient：依次返回预设的响应或抛出异常"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    async def post(self, url, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def _error(code):
+    return httpx.Response(400, json={"error": code})
+
+
+class PollDeviceFlowIntervalTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        now = time.monotonic()
+        device_flow._mgr.device = DeviceFlowState(
+            client_id="cid",
+            client_secret="secret",
+            device_code="dc",
+            user_code="UC",
+            verification_uri="https://example.invalid",
+            interval=5,
+            expires_at=now + 600,
+            region="us-east-1",
+            started_at=now,
+        )
+        self.addCleanup(setattr, device_flow._mgr, "device", None)
+
+    def _use(self, *outcomes):
+        client = _StubClient(*outcomes)
+        patcher = mock.patch.object(device_flow, "_get_client", return_value=client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return client
+
+    async def test_pending_adds_bounded_jitter(self):
+        self._use(*[_error("authorization_pending") for _ in range(3)])
+        with mock.patch.object(device_flow.random, "uniform", side_effect=[-0.3, 0.3, 0.1]) as uniform:
+            results = [await poll_device_flow() for _ in range(3)]
+
+        uniform.assert_called_with(-device_flow.POLL_JITTER, device_flow.POLL_JITTER)
+        self.assertEqual([r[1]["interval"] for r in results], [4.7, 5.3, 5.1])
+        for ok, body in results:
+            self.assertTrue(ok)
+            self.assertEqual(body["status"], "pending")
+        # 抖动不累积到保存的间隔上
+        self.assertEqual(device_flow._mgr.device.interval, 5)
+
+    async def test_slow_down_adds_five_seconds_up_to_cap(self):
+        self._use(*[_error("slow_down") for _ in range(6)])
+        intervals = []
+        for _ in range(6):
+            ok, body = await poll_device_flow()
+            self.assertTrue(ok)
+            self.assertEqual(body["status"], "slow_down")
+            intervals.append(body["interval"])
+
+        self.assertEqual(intervals, [10, 15, 20, 25, 30, 30])
+
+    async def test_network_error_doubles_once(self):
+        self._use(httpx.ConnectError("down"), httpx.ConnectError("down"))
+        first = await poll_device_flow()
+        second = await poll_device_flow()
+
+        self.assertEqual(first, (True, {"completed": False, "status": "network_error", "interval": 10}))
+        self.assertEqual(second[1]["interval"], 10)
+        self.assertIsNotNone(device_flow._mgr.device)
+
+    async def test_network_error_backoff_capped(self):
+        device_flow._mgr.device.interval = 7
+        self._use(httpx.ConnectError("down"))
+        _, body = await poll_device_flow()
+        self.assertEqual(body["interval"], device_flow.POLL_NETWORK_BACKOFF_CAP)
+
+        # 已超过上限的间隔不会被缩短
+        device_flow._mgr.device.interval = 20
+        device_flow._mgr.device.network_backoff = False
+        self._use(httpx.ConnectError("down"))
+        _, body = await poll_device_flow()
+        self.assertEqual(body["interval"], 20)
+
+    async def test_terminal_errors_end_the_flow(self):
+        self._use(_error("access_denied"))
+        ok, body = await poll_device_flow()
+        self.assertFalse(ok)
+        self.assertIn("error", body)
+        self.assertIsNone(device_flow._mgr.device)
+
+
+class SharedClientTests(unittest.TestCase):
+    def tearDown(self):
+        asyncio.run(device_flow.close_http_client())
+
+    def test_client_from_previous_loop_is_closed_on_rebuild(self):
+        async def get_client():
+            return device_flow._get_client()
+
+        async def get_client_and_settle():
+            client = device_flow._get_client()
+            await asyncio.sleep(0)
+            return client
+
+        first = asyncio.run(get_client())
+        self.assertFalse(first.is_closed)
+
+        second = asyncio.run(get_client_and_settle())
+
+        self.assertIsNot(first, second)
+        self.assertTrue(first.is_closed)
+        self.assertFalse(device_flow._closing_tasks)
+
+    def test_same_loop_reuses_client(self):
+        async def get_twice():
+            return device_flow._get_client(), device_flow._get_client()
+
+        a, b = asyncio.run(get_twice())
+        self.assertIs(a, b)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import copy
+import unittest
+
+from kiro_proxy.core.history_manager import HistoryManager
+
+
+def _user(content, ctx=None, model="claude-sonnet-4.5"):
+    uim = {"content": content, "modelId": model, "origin": "AI_EDITOR"}
+    if ctx is not None:
+        uim["userInputMessageContext"] = ctx
+    return {"userInputMessage": uim}
+
+
+def _assistant(content, tool_ids=()):
+    arm = {"content": content}
+    if tool_ids:
+        arm["toolUses"] = [{"toolUseId": t, "name": "read", "input": {}} for t in tool_ids]
+    return {"assistantResponseMessage": arm}
+
+
+def _results(*ids):
+    return [{"toolUseId": t, "status": "success", "content": [{"text": t}]} for t in ids]
+
+
+def make_history():
+    return [
+        _assistant("leading assistant", ["t0"]),
+        _user("first", {"toolResults": _results("t0")}),
+        _assistant("calls t1", ["t1"]),
+        _user("mixed", {"toolResults": _results("t1", "t2")}),
+        _assistant("no tools"),
+        _user("orphan with tools", {"toolResults": _results("t3"), "tools": [{"name": "read"}]}),
+        _assistant("no tools again"),
+        _user("orphan only", {"toolResults": _results("t4")}),
+    ]
+
+
+def make_history_without_tool_uses():
+    return [
+        _user("first"),
+        _assistant("plain"),
+        _user("orphan", {"toolResults": _results("t9")}),
+    ]
+
+
+def _strip_context(msg):
+    msg = copy.deepcopy(msg)
+    msg["userInputMessage"].pop("userInputMessageContext", None)
+    return msg
+
+
+class BuildSummaryHistoryTests(unittest.TestCase):
+    def test_does_not_mutate_caller_messages(self):
+        history = make_history()
+        items = list(history)
+        snapshot = copy.deepcopy(history)
+
+        HistoryManager()._build_summary_history("summary", history)
+
+        self.assertEqual(history, snapshot)
+        for before, after in zip(items, history):
+            self.assertIs(before, after)
+
+    def test_orphan_tool_results_dropped_like_baseline(self):
+        history = make_history()
+        result = HistoryManager()._build_summary_history("summary", history)
+
+        self.assertIn("summary", result[0]["userInputMessage"]["content"])
+        self.assertEqual(result[0]["userInputMessage"]["modelId"], "claude-sonnet-4.5")
+        self.assertNotIn("toolUses", result[1]["assistantResponseMessage"])
+
+        expected = [
+            # 开头的 assistant 被跳过；第一条 user 的 toolResults 被清除
+            _strip_context(history[1]),
+            history[2],
+            # 只保留有对应 toolUse 的 toolResults
+            _user("mixed", {"toolResults": _results("t1")}),
+            history[4],
+            # 去掉孤立的 toolResults，保留上下文中的其它字段
+            _user("orphan with tools", {"tools": [{"name": "read"}]}),
+            history[6],
+            # 上下文清空后整个移除
+            _strip_context(history[7]),
+        ]
+        self.assertEqual(result[2:], expected)
+
+    def test_all_tool_results_dropped_without_tool_uses(self):
+        history = make_history_without_tool_uses()
+        snapshot = copy.deepcopy(history)
+
+        result = HistoryManager()._build_summary_history("summary", history)
+
+        self.assertEqual(result[2:], [history[0], history[1], _strip_context(history[2])])
+        self.assertEqual(history, snapshot)
+
+
+if __name__ == "__main__":
+    unittest.main()
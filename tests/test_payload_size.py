@@ -0,0 +1,20 @@
+import unittest
+
+import httpx
+
+from kiro_proxy.payload_guards import check_payload_size
+
+
+class PayloadSizeTests(unittest.TestCase):
+    def test_integers_beyond_64_bits_are_measured(self):
+        payload = {"toolUses": [{"input": {"id": 2 ** 64}}]}
+        self.assertEqual(check_payload_size(payload), len(b'{"toolUses":[{"input":{"id":18446744073709551616}}]}'))
+
+    def test_matches_httpx_request_body(self):
+        payload = {"content": "中文内容" * 10, "n": 2 ** 65, "items": [1, 2.5, None, True]}
+        request = httpx.Request("POST", "https://example.invalid", json=payload)
+        self.assertEqual(check_payload_size(payload), len(request.content))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import kiro_proxy.core  # noqa: F401  确保子模块已加载
+from kiro_proxy.core.account import Account
+
+# kiro_proxy.core 包里导出的 state 是 ProxyState 实例，会遮住同名子模块
+state_module = sys.modules["kiro_proxy.core.state"]
+
+
+def _make_state():
+    with mock.patch.object(state_module, "load_accounts", return_value=[]), \
+            mock.patch.object(state_module, "TOKEN_PATH", Path("/nonexistent/kiro-token.json")), \
+            mock.patch.object(state_module.atexit, "register"):
+        return state_module.ProxyState()
+
+
+def _account(account_id):
+    return Account(id=account_id, name=account_id, token_path=f"/tmp/{account_id}.json")
+
+
+class AccountIndexTests(unittest.TestCase):
+    def test_appended_account_found_after_index_built(self):
+        state = _make_state()
+        state.accounts.append(_account("a"))
+        self.assertIsNotNone(state.get_account("a"))
+
+        state.accounts.append(_account("b"))
+
+        self.assertEqual(state.get_account("b").id, "b")
+        self.assertIsNone(state.get_account("missing"))
+
+    def test_reassignment_resets_index(self):
+        state = _make_state()
+        state.accounts.append(_account("a"))
+        state.accounts.append(_account("b"))
+        self.assertIsNotNone(state.get_account("a"))
+
+        state.accounts = [a for a in state.accounts if a.id != "a"]
+        state.accounts.append(_account("c"))
+
+        self.assertIsNone(state.get_account("a"))
+        self.assertEqual(state.get_account("c").id, "c")
+
+    def test_renamed_id_rebuilds_index(self):
+        state = _make_state()
+        acc = _account("a")
+        state.accounts.append(acc)
+        self.assertIs(state.get_account("a"), acc)
+
+        acc.id = "renamed"
+
+        self.assertIsNone(state.get_account("a"))
+        self.assertIs(state.get_account("renamed"), acc)
+
+
+class AccountSaveDebounceTests(unittest.TestCase):
+    def setUp(self):
+        self.state = _make_state()
+        self.state.accounts.append(_account("a"))
+        patcher = mock.patch.object(state_module, "save_accounts", return_value=True)
+        self.save = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.state.flush_accounts)
+
+    def test_burst_of_saves_writes_once(self):
+        with mock.patch.object(state_module, "SAVE_DEBOUNCE_SECONDS", 0.05):
+            for i in range(10):
+                self.state.accounts[0].name = f"name-{i}"
+                self.state._save_accounts()
+            timer = self.state._save_timer
+        timer.join(1)
+
+        self.assertFalse(timer.is_alive())
+        self.save.assert_called_once()
+        (written,), _ = self.save.call_args
+        self.assertEqual(written[0]["name"], "name-9")
+
+    def test_flush_writes_pending_immediately_and_cancels_timer(self):
+        with mock.patch.object(state_module, "SAVE_DEBOUNCE_SECONDS", 60):
+            self.state._save_accounts()
+        timer = self.state._save_timer
+        self.save.assert_not_called()
+
+        self.assertTrue(self.state.flush_accounts())
+
+        self.save.assert_called_once()
+        self.assertIsNone(self.state._save_timer)
+        timer.join(1)
+        self.assertFalse(timer.is_alive())
+        self.assertIsNone(self.state._pending_accounts)
+
+        # 没有待写数据时再次 flush 不写盘
+        self.assertTrue(self.state.flush_accounts())
+        self.save.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
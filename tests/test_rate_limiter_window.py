@@ -0,0 +1,40 @@
+import sys
+import unittest
+from unittest import mock
+
+from kiro_proxy.core.rate_limiter import AccountRateState, RateLimitConfig, RateLimiter
+
+rate_limiter = sys.modules["kiro_proxy.core.rate_limiter"]
+
+
+class RequestWindowTests(unittest.TestCase):
+    def test_short_window_does_not_drop_minute_records(self):
+        state = AccountRateState()
+        now = 1000.0
+        for age in (50, 30, 10, 1):
+            state.request_times.append(now - age)
+
+        with mock.patch.object(rate_limiter.time, "monotonic", return_value=now):
+            self.assertEqual(state.get_requests_in_window(20), 2)
+            self.assertEqual(state.get_requests_in_window(60), 4)
+        self.assertEqual(len(state.request_times), 4)
+
+    def test_limiter_counts_full_minute_after_short_window_query(self):
+        limiter = RateLimiter(RateLimitConfig(
+            enabled=True, min_request_interval=0, max_requests_per_minute=3,
+        ))
+        clock = [1000.0]
+        with mock.patch.object(rate_limiter.time, "monotonic", side_effect=lambda: clock[0]):
+            for _ in range(3):
+                limiter.record_request("a")
+                clock[0] += 15
+
+            limiter._get_account_state("a").get_requests_in_window(10)
+            allowed, _, reason = limiter.can_request("a")
+
+        self.assertFalse(allowed)
+        self.assertIn("3/分钟", reason)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import sys
+import types
+import unittest
+from unittest import mock
+
+from kiro_proxy import tokenizer
+
+
+class EncodingInitTests(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.multiple(
+            tokenizer, _encoding=None, _encoding_initialized=False, _encoding_retry_at=0.0
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _fake_tiktoken(self, get_encoding):
+        module = types.SimpleNamespace(get_encoding=get_encoding)
+        return mock.patch.dict(sys.modules, {"tiktoken": module})
+
+    def test_transient_failure_is_retried_after_backoff(self):
+        encoding = object()
+        get_encoding = mock.Mock(side_effect=[OSError("download failed"), encoding])
+        clock = [1000.0]
+        with self._fake_tiktoken(get_encoding), \
+                mock.patch.object(tokenizer.time, "monotonic", side_effect=lambda: clock[0]):
+            self.assertIsNone(tokenizer._get_encoding())
+            self.assertIsNone(tokenizer._get_encoding())
+            self.assertEqual(get_encoding.call_count, 1)
+
+            clock[0] += tokenizer.ENCODING_RETRY_SECONDS
+            self.assertIs(tokenizer._get_encoding(), encoding)
+            self.assertIs(tokenizer._get_encoding(), encoding)
+
+        self.assertEqual(get_encoding.call_count, 2)
+
+    def test_missing_tiktoken_is_not_retried(self):
+        with mock.patch.dict(sys.modules, {"tiktoken": None}):
+            self.assertIsNone(tokenizer._get_encoding())
+        self.assertTrue(tokenizer._encoding_initialized)
+
+
+if __name__ == "__main__":
+    unittest.main()